@@ -0,0 +1,11 @@
+# Gunicorn hooks for main:app (loaded with --config by procfile, railway.toml and railway.json)
+
+def post_worker_init(worker):
+    """Runs on the worker's main thread after gunicorn installed its own signal handlers,
+    so the drain-on-SIGTERM handler can be installed here and chain to them"""
+    import main
+
+    main.shutdown.install()
+    if main.BROWSER_SESSION_SLOTS >= worker.cfg.threads:
+        main.logger.warning(f"⚠️ BROWSER_SESSION_SLOTS={main.BROWSER_SESSION_SLOTS} leaves none of "
+                            f"{worker.cfg.threads} threads for /status and /health - lower it or raise --threads")
@@ -33,15 +33,40 @@ import os
 import time
 import json
 import requests
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timedelta, timezone
 import base64
 import logging
+import logging.handlers
 import traceback
 import sys
 from typing import Dict, Optional, Any
 import threading
-from contextlib import contextmanager
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
 import re
+import queue
+import atexit
+import itertools
+import contextvars
+import uuid
+import gzip
+import sqlite3
+import csv
+import io
+import socket
+import functools
+import hashlib
+import hmac
+import signal
+import tracemalloc
+import zlib
+import cProfile
+import pstats
+import ipaddress
+from urllib.parse import urlparse
+from array import array
+from collections import OrderedDict, deque
 
 # Selenium imports for REMOTE WebDriver
 from selenium import webdriver
@@ -51,17 +76,114 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from webdriver_replay import (CommandStats, InstrumentedRemoteConnection, RecordingRemoteConnection,
+                              current_command_stats, process_command_stats)
+
+# Optional fast JSON encoder and brotli compression - stdlib json/gzip are used when missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 📝 Non-blocking structured logging: request threads only enqueue records,
+# a QueueListener thread formats them as JSON and writes to stdout
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+DEBUG_LOG_SAMPLE_RATE = int(os.getenv('DEBUG_LOG_SAMPLE_RATE', '10'))  # keep 1 in N DEBUG records
+
+# Collection run currently executing on this thread/context
+current_run_id = contextvars.ContextVar('current_run_id', default=None)
+
+class RunContextFilter(logging.Filter):
+    """Stamp every record with the active collection run ID"""
+    
+    def filter(self, record):
+        record.run_id = current_run_id.get()
+        return True
+
+class DebugSamplingFilter(logging.Filter):
+    """Pass only 1 in N DEBUG records so chatty lines don't flood the log queue"""
+    
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = max(1, rate)
+        self._counter = itertools.count()
+    
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate == 1:
+            return True
+        return next(self._counter) % self.rate == 0
+
+def _build_log_formatter():
+    """JSON formatter via python-json-logger, plain text if it is unavailable"""
+    try:
+        from pythonjsonlogger import jsonlogger
+        return jsonlogger.JsonFormatter(
+            '%(asctime)s %(name)s %(levelname)s %(message)s %(run_id)s',
+            rename_fields={'asctime': 'timestamp', 'levelname': 'level'},
+            json_ensure_ascii=False
+        )
+    except ImportError:
+        return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(run_id)s] %(message)s')
+
+def _configure_logging():
+    """Route the root logger through a QueueHandler drained by a QueueListener"""
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_build_log_formatter())
+    
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RunContextFilter())
+    queue_handler.addFilter(DebugSamplingFilter(DEBUG_LOG_SAMPLE_RATE))
+    
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    
+    listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return queue_handler, listener
+
+_log_queue_handler, _log_listener = _configure_logging()
+
+def _restart_log_listener():
+    """Listener threads don't survive fork (gunicorn --preload) - start a fresh one in the worker"""
+    global _log_listener
+    fresh_queue = queue.SimpleQueue()
+    _log_queue_handler.queue = fresh_queue
+    _log_listener = logging.handlers.QueueListener(fresh_queue, *_log_listener.handlers, respect_handler_level=True)
+    _log_listener.start()
+
+def _stop_log_listener():
+    """Flush queued records on interpreter exit"""
+    try:
+        _log_listener.stop()
+    except Exception:
+        pass
+
+os.register_at_fork(after_in_child=_restart_log_listener)
+atexit.register(_stop_log_listener)
 
-# Configure comprehensive logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
+@contextmanager
+def log_step(step, **fields):
+    """Emit a structured record with the duration (and WebDriver round-trips) of one pipeline step"""
+    command_stats = current_command_stats.get()
+    commands_before = command_stats.total if command_stats is not None else 0
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        if command_stats is not None:
+            fields["webdriver_commands"] = command_stats.total - commands_before
+            command_stats.add_step(step, fields["webdriver_commands"])
+        logger.info(f"⏱️ Step {step} took {duration_ms}ms",
+                    extra={"step": step, "duration_ms": duration_ms, **fields})
+
 app = Flask(__name__)
 
 # 🔧 COMPREHENSIVE CORS CONFIGURATION WITH EXPLICIT HEADERS
@@ -94,6 +216,116 @@ def handle_preflight():
         response.headers['Access-Control-Max-Age'] = '86400'
         return response
 
+# ⚡ Large debug/diagnostic payloads: fast encoding, compression and field projection
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+
+def encode_json(payload):
+    """Serialize to UTF-8 JSON bytes, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=str, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def project_fields(payload, fields):
+    """Keep only the requested dotted paths, e.g. overall_success,steps.qptr_extraction.extracted_values"""
+    projected = {}
+    for path in fields:
+        keys = [key for key in path.split('.') if key]
+        if not keys:
+            continue
+        value = payload
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = projected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return projected
+
+def fast_json_response(payload, status=200):
+    """JSON response honouring ?fields= projection and br/gzip Accept-Encoding negotiation"""
+    fields = request.args.get('fields')
+    if fields and isinstance(payload, dict):
+        payload = project_fields(payload, fields.split(','))
+    
+    body = encode_json(payload)
+    headers = {'Vary': 'Accept-Encoding'}
+    
+    if len(body) >= COMPRESSION_MIN_BYTES:
+        accepted = request.accept_encodings
+        if brotli is not None and accepted.quality('br') > 0:
+            body = brotli.compress(body, quality=5)
+            headers['Content-Encoding'] = 'br'
+        elif accepted.quality('gzip') > 0:
+            body = gzip.compress(body, compresslevel=5)
+            headers['Content-Encoding'] = 'gzip'
+    
+    return Response(body, status=status, mimetype='application/json', headers=headers)
+
+# ⏱️ Overall budget for one collection run - kept under gunicorn's 300s worker timeout
+COLLECTION_BUDGET_SECONDS = float(os.getenv('COLLECTION_BUDGET_SECONDS', '270'))
+
+class DeadlineExceeded(Exception):
+    """Raised when a step cannot finish inside the remaining request budget"""
+    
+    def __init__(self, step, remaining):
+        self.step = step
+        self.remaining = remaining
+        super().__init__(f"Deadline exceeded at '{step}' ({remaining:.1f}s of budget left)")
+
+class CollectionDeadline:
+    """⏱️ Per-request time budget shared by every step of a collection run"""
+    
+    def __init__(self, budget_seconds=None):
+        self.budget_seconds = COLLECTION_BUDGET_SECONDS if budget_seconds is None else float(budget_seconds)
+        self.started = time.monotonic()
+        self.expires_at = self.started + self.budget_seconds
+    
+    def remaining(self):
+        """Seconds left before the run must stop"""
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def elapsed(self):
+        """Seconds spent since the deadline was created"""
+        return time.monotonic() - self.started
+    
+    def check(self, step, needed=0.0):
+        """Abort before a step that cannot fit in the remaining budget"""
+        remaining = self.remaining()
+        if remaining <= needed:
+            raise DeadlineExceeded(step, remaining)
+    
+    def timeout(self, cap):
+        """Size a network/driver timeout from the remaining budget, never above cap"""
+        return max(0.1, min(float(cap), self.remaining()))
+    
+    def sleep(self, seconds, step="wait"):
+        """Sleep unless doing so would run past the deadline"""
+        self.check(step, needed=seconds)
+        time.sleep(seconds)
+    
+    def to_dict(self):
+        return {
+            "budget_seconds": self.budget_seconds,
+            "elapsed_seconds": round(self.elapsed(), 3),
+            "remaining_seconds": round(self.remaining(), 3)
+        }
+
+def reset_driver_timeouts(driver, deadline):
+    """Page-load/implicit waits for a fresh run - budgeted_get may have shrunk them on a previous one"""
+    driver.set_page_load_timeout(deadline.timeout(30))  # Reduced from 60
+    driver.implicitly_wait(deadline.timeout(10))       # Reduced from 15
+
+def budgeted_get(driver, url, deadline, cap=30):
+    """Navigate with a page-load timeout that never outlives the deadline"""
+    deadline.check("page_load")
+    page_load_timeout = deadline.timeout(cap)
+    if page_load_timeout < cap:
+        driver.set_page_load_timeout(page_load_timeout)
+    driver.get(url)
+
 class RobloxVerificationSolver:
     def __init__(self, api_key=None):
         # Your 2Captcha API key
@@ -113,13 +345,14 @@ class RobloxVerificationSolver:
         else:
             logger.warning("⚠️ No 2Captcha API key provided")
     
-    def solve_roblox_verification(self, driver):
+    def solve_roblox_verification(self, driver, deadline=None):
         """Handle Roblox verification puzzles with 2Captcha automated solving"""
+        deadline = deadline or CollectionDeadline()
         try:
             logger.info("🔍 Checking for Roblox verification puzzles...")
             
             # Wait for verification to appear
-            time.sleep(5)
+            deadline.sleep(5, "verification_wait")
             
             # Get page content
             page_source = driver.page_source
@@ -141,7 +374,7 @@ class RobloxVerificationSolver:
             
             if not self.solver:
                 logger.error("❌ 2Captcha solver not available")
-                return self._fallback_verification_strategies(driver, None)
+                return self._fallback_verification_strategies(driver, None, deadline)
             
             # Get screenshot for debugging
             screenshot_b64 = driver.get_screenshot_as_base64()
@@ -155,12 +388,14 @@ class RobloxVerificationSolver:
             logger.info(f"🔑 Using site key: {site_key}")
             
             try:
-                # Solve with 2Captcha FunCaptcha method
+                # Solve with 2Captcha FunCaptcha method - polling bounded by the run budget
+                deadline.check("twocaptcha_solve", needed=15)
                 current_url = driver.current_url
                 result = self.solver.funcaptcha(
                     sitekey=site_key,
                     url=current_url,
-                    api_server='api.arkoselabs.com'
+                    api_server='api.arkoselabs.com',
+                    timeout=deadline.timeout(120)
                 )
                 
                 solution_code = result['code']
@@ -170,7 +405,7 @@ class RobloxVerificationSolver:
                 self._submit_funcaptcha_solution(driver, solution_code)
                 
                 # Wait for verification to complete
-                time.sleep(10)
+                deadline.sleep(10, "verification_complete")
                 
                 # Check if verification was successful
                 final_page_text = driver.find_element(By.TAG_NAME, "body").text.lower()
@@ -185,12 +420,16 @@ class RobloxVerificationSolver:
                     }
                 else:
                     logger.warning("⚠️ Verification solution submitted but challenge still present")
-                    return self._fallback_verification_strategies(driver, screenshot_b64)
+                    return self._fallback_verification_strategies(driver, screenshot_b64, deadline)
                     
+            except DeadlineExceeded:
+                raise
             except Exception as solve_error:
                 logger.error(f"❌ 2Captcha solving failed: {solve_error}")
-                return self._fallback_verification_strategies(driver, screenshot_b64)
+                return self._fallback_verification_strategies(driver, screenshot_b64, deadline)
                 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"❌ Verification handling error: {str(e)}")
             return {"success": False, "error": str(e), "method": "error"}
@@ -243,12 +482,13 @@ class RobloxVerificationSolver:
         except Exception as e:
             logger.warning(f"Solution submission failed: {e}")
     
-    def _fallback_verification_strategies(self, driver, screenshot_b64):
+    def _fallback_verification_strategies(self, driver, screenshot_b64, deadline=None):
         """Fallback strategies when automated solving fails"""
+        deadline = deadline or CollectionDeadline()
         try:
             # Strategy 1: Wait and see if verification auto-resolves
             logger.info("⏳ Strategy 1: Waiting for auto-resolution...")
-            time.sleep(10)
+            deadline.sleep(10, "verification_auto_resolve")
             
             page_text = driver.find_element(By.TAG_NAME, "body").text.lower()
             if "verification" not in page_text:
@@ -257,8 +497,9 @@ class RobloxVerificationSolver:
             
             # Strategy 2: Refresh page
             logger.info("🔄 Strategy 2: Refreshing page...")
+            deadline.check("verification_refresh")
             driver.refresh()
-            time.sleep(8)
+            deadline.sleep(8, "verification_refresh")
             
             page_text = driver.find_element(By.TAG_NAME, "body").text.lower()
             if "verification" not in page_text:
@@ -267,8 +508,8 @@ class RobloxVerificationSolver:
             
             # Strategy 3: Go back to login page
             logger.info("🔙 Strategy 3: Going back to login page...")
-            driver.get("https://www.roblox.com/login")
-            time.sleep(5)
+            budgeted_get(driver, "https://www.roblox.com/login", deadline)
+            deadline.sleep(5, "verification_login_reset")
             
             # Check if we need to login again
             if "login" in driver.current_url.lower():
@@ -282,6 +523,8 @@ class RobloxVerificationSolver:
                 "message": "Manual intervention may be needed"
             }
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"❌ Wait and retry failed: {str(e)}")
             return {"success": False, "error": str(e)}
@@ -295,7 +538,7 @@ class RobloxAPIAuth:
         self.session = requests.Session()
         self.roblosecurity_cookie = None
         
-    def authenticate_via_api(self, roblosecurity_cookie=None):
+    def authenticate_via_api(self, roblosecurity_cookie=None, timeout=10):
         """Authenticate using .ROBLOSECURITY cookie"""
         try:
             if roblosecurity_cookie:
@@ -309,7 +552,7 @@ class RobloxAPIAuth:
             self.session.cookies.set('.ROBLOSECURITY', self.roblosecurity_cookie, domain='.roblox.com')
             
             # Verify authentication
-            response = self.session.get('https://users.roblox.com/v1/users/authenticated')
+            response = self.session.get('https://users.roblox.com/v1/users/authenticated', timeout=timeout)
             
             if response.status_code == 200:
                 user_data = response.json()
@@ -339,6 +582,1014 @@ class RobloxAPIAuth:
             logger.error(f"❌ API analytics error: {e}")
             return {"success": False, "error": str(e)}
 
+# 🗄️ Persistent collection history (SQLite file, WAL mode so exports never block writers)
+ANALYTICS_DB_PATH = os.getenv('ANALYTICS_DB_PATH', 'analytics_history.db')
+
+@contextmanager
+def closing_sqlite(db_path):
+    """Short-lived SQLite connection that commits on success and always closes"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+# Latest instant a since/until parameter may name - keeps bucket math inside SQLite's integer range
+MAX_TIME_PARAM = datetime(9999, 12, 31).timestamp()
+
+def parse_time_param(value):
+    """Accept epoch seconds or ISO-8601 for since/until query parameters"""
+    if value is None or value == '':
+        return None
+    try:
+        timestamp = float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+    # Also rejects inf and nan
+    if not 0 <= timestamp <= MAX_TIME_PARAM:
+        raise ValueError(f"'{value}' is out of range - use epoch seconds between 0 and {MAX_TIME_PARAM:.0f}")
+    return timestamp
+
+class AnalyticsHistoryStore:
+    """🗄️ SQLite-backed history of collection runs and their extracted metrics"""
+    
+    EXPORT_BATCH_SIZE = 500
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS collection_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT,
+                    game_id TEXT NOT NULL,
+                    collected_at REAL NOT NULL,
+                    overall_success INTEGER NOT NULL,
+                    duration_seconds REAL,
+                    authentication_method TEXT,
+                    metrics TEXT NOT NULL DEFAULT '{}',
+                    aborted INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_collection_runs_game
+                    ON collection_runs (game_id, id);
+                CREATE TABLE IF NOT EXISTS metric_rollups (
+                    game_id TEXT NOT NULL,
+                    resolution TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    bucket_start INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    min_value REAL NOT NULL,
+                    max_value REAL NOT NULL,
+                    sum_value REAL NOT NULL,
+                    last_value REAL NOT NULL,
+                    last_at REAL NOT NULL,
+                    PRIMARY KEY (game_id, resolution, metric, bucket_start)
+                );
+                CREATE TABLE IF NOT EXISTS history_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                );
+            """)
+            # Files created before aborted runs were flagged get the column in place
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(collection_runs)")}
+            if "aborted" not in columns:
+                conn.execute("ALTER TABLE collection_runs ADD COLUMN aborted INTEGER NOT NULL DEFAULT 0")
+            self._backfill_rollups(conn)
+    
+    def _connection(self):
+        """Short-lived connection per operation - safe across request threads"""
+        return closing_sqlite(self.db_path)
+    
+    # Rollup resolutions and their bucket widths in seconds (UTC-aligned)
+    ROLLUP_RESOLUTIONS = {"hour": 3600, "day": 86400}
+    
+    @classmethod
+    def _apply_rollups(cls, conn, game_id, collected_at, metrics):
+        """Fold one run's metrics into every hourly/daily bucket it belongs to"""
+        for resolution, width in cls.ROLLUP_RESOLUTIONS.items():
+            bucket_start = int(collected_at // width) * width
+            for metric, value in metrics.items():
+                conn.execute("""
+                    INSERT INTO metric_rollups (game_id, resolution, metric, bucket_start, count,
+                        min_value, max_value, sum_value, last_value, last_at)
+                    VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+                    ON CONFLICT (game_id, resolution, metric, bucket_start) DO UPDATE SET
+                        count = count + 1,
+                        min_value = MIN(min_value, excluded.min_value),
+                        max_value = MAX(max_value, excluded.max_value),
+                        sum_value = sum_value + excluded.sum_value,
+                        last_value = CASE WHEN excluded.last_at >= last_at THEN excluded.last_value ELSE last_value END,
+                        last_at = MAX(last_at, excluded.last_at)
+                """, (game_id, resolution, metric, bucket_start, value, value, value, value, collected_at))
+    
+    def _backfill_rollups(self, conn):
+        """Build rollups once for history recorded before rollups existed - a marker row records completion"""
+        if conn.execute("SELECT 1 FROM history_meta WHERE key = 'rollups_backfilled'").fetchone():
+            return
+        last_id = 0
+        # Files from before the marker existed already have their rollups - don't count runs twice
+        already_built = conn.execute("SELECT 1 FROM metric_rollups LIMIT 1").fetchone() is not None
+        while not already_built:
+            rows = conn.execute(
+                "SELECT id, game_id, collected_at, metrics FROM collection_runs WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, self.EXPORT_BATCH_SIZE)
+            ).fetchall()
+            for _, game_id, collected_at, metrics in rows:
+                self._apply_rollups(conn, game_id, collected_at, json.loads(metrics))
+            if len(rows) < self.EXPORT_BATCH_SIZE:
+                break
+            last_id = rows[-1][0]
+        # Same transaction as the rollups: a crash mid-backfill leaves neither behind
+        conn.execute("INSERT OR REPLACE INTO history_meta (key, value) VALUES ('rollups_backfilled', ?)",
+                     (datetime.now().isoformat(),))
+    
+    @staticmethod
+    def metrics_from_results(results):
+        """Pull the named numeric metrics out of a collection result"""
+        qptr_result = results.get("steps", {}).get("qptr_extraction") or {}
+        return dict(qptr_result.get("metrics") or {})
+    
+    def record_run(self, results):
+        """Append one finished collection run, returns its row id (the export cursor)"""
+        collected_at = datetime.fromisoformat(results["end_time"]).timestamp()
+        metrics = self.metrics_from_results(results)
+        with self._write_lock, self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO collection_runs (run_id, game_id, collected_at, overall_success, "
+                "duration_seconds, authentication_method, metrics, aborted) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    results.get("run_id"),
+                    str(results["game_id"]),
+                    collected_at,
+                    int(bool(results.get("overall_success"))),
+                    results.get("duration_seconds"),
+                    results.get("authentication_method"),
+                    json.dumps(metrics),
+                    int(bool(results.get("aborted")))
+                )
+            )
+            # Rollups are maintained in the same transaction as the raw row
+            self._apply_rollups(conn, str(results["game_id"]), collected_at, metrics)
+            return cursor.lastrowid
+    
+    def last_collected_at(self, game_id):
+        """Epoch seconds of the newest recorded run for game_id, None if it has never run"""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT collected_at FROM collection_runs WHERE game_id = ? ORDER BY id DESC LIMIT 1",
+                (str(game_id),)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def latest_run(self, game_id):
+        """Newest recorded run for game_id (collected_at in epoch seconds), None if it has never run"""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT run_id, game_id, collected_at, overall_success, duration_seconds, authentication_method, "
+                "metrics, aborted FROM collection_runs WHERE game_id = ? ORDER BY id DESC LIMIT 1",
+                (str(game_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "run_id": row[0],
+            "game_id": row[1],
+            "collected_at": row[2],
+            "overall_success": bool(row[3]),
+            "duration_seconds": row[4],
+            "authentication_method": row[5],
+            "metrics": json.loads(row[6]),
+            "aborted": bool(row[7])
+        }
+    
+    def iter_runs(self, game_id, since=None, until=None, after_cursor=0):
+        """Yield runs in cursor order, one bounded batch in memory at a time"""
+        last_id = after_cursor
+        while True:
+            query = ("SELECT id, run_id, game_id, collected_at, overall_success, duration_seconds, "
+                     "authentication_method, metrics FROM collection_runs WHERE game_id = ? AND id > ?")
+            params = [str(game_id), last_id]
+            if since is not None:
+                query += " AND collected_at >= ?"
+                params.append(since)
+            if until is not None:
+                query += " AND collected_at < ?"
+                params.append(until)
+            query += " ORDER BY id LIMIT ?"
+            params.append(self.EXPORT_BATCH_SIZE)
+            
+            # Reopen per batch so a slow client never pins a read transaction
+            with self._connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+            
+            for row in rows:
+                yield {
+                    "cursor": row[0],
+                    "run_id": row[1],
+                    "game_id": row[2],
+                    "collected_at": datetime.fromtimestamp(row[3]).isoformat(),
+                    "overall_success": bool(row[4]),
+                    "duration_seconds": row[5],
+                    "authentication_method": row[6],
+                    "metrics": json.loads(row[7])
+                }
+            
+            if len(rows) < self.EXPORT_BATCH_SIZE:
+                return
+            last_id = rows[-1][0]
+    
+    def rollup_series(self, game_id, resolution, since, until, metric=None):
+        """Read pre-aggregated buckets - cost depends on the range, not on raw history size"""
+        query = ("SELECT metric, bucket_start, count, min_value, max_value, sum_value, last_value "
+                 "FROM metric_rollups WHERE game_id = ? AND resolution = ? "
+                 "AND bucket_start >= ? AND bucket_start < ?")
+        params = [str(game_id), resolution, since, until]
+        if metric:
+            query += " AND metric = ?"
+            params.append(metric)
+        query += " ORDER BY metric, bucket_start"
+        
+        series = {}
+        with self._connection() as conn:
+            for name, bucket_start, count, min_value, max_value, sum_value, last_value in conn.execute(query, params):
+                series.setdefault(name, []).append({
+                    "bucket_start": datetime.fromtimestamp(bucket_start).isoformat(),
+                    "count": count,
+                    "min": min_value,
+                    "max": max_value,
+                    "mean": sum_value / count,
+                    "last": last_value
+                })
+        return series
+
+# 📣 Webhook push of new results - persistent outbox, batched/coalesced delivery, retry with backoff
+WEBHOOK_BATCH_WINDOW_SECONDS = float(os.getenv('WEBHOOK_BATCH_WINDOW_SECONDS', '2'))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '8'))
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv('WEBHOOK_TIMEOUT_SECONDS', '10'))
+# Managing subscribers needs "Authorization: Bearer <token>"; unset = webhook endpoints disabled
+WEBHOOK_ADMIN_TOKEN = os.getenv('WEBHOOK_ADMIN_TOKEN')
+# Private, loopback and link-local targets are refused unless this is set (local sinks, tests)
+WEBHOOK_ALLOW_PRIVATE_HOSTS = os.getenv('WEBHOOK_ALLOW_PRIVATE_HOSTS', 'false').lower() in ('1', 'true', 'yes')
+
+class WebhookDispatcher:
+    """📣 Notify registered subscribers when a collection for a game finishes"""
+    
+    POLL_SECONDS = 5
+    CLAIM_SECONDS = 60  # rows being delivered are hidden from other workers this long
+    
+    def __init__(self, db_path, allow_private_hosts=WEBHOOK_ALLOW_PRIVATE_HOSTS):
+        self.db_path = db_path
+        self.allow_private_hosts = allow_private_hosts
+        # Pooled keep-alive connections shared by every delivery
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        with closing_sqlite(self.db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS webhook_subscribers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    game_ids TEXT,
+                    secret TEXT,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS webhook_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    subscriber_id INTEGER NOT NULL,
+                    game_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    dead INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_webhook_outbox_due
+                    ON webhook_outbox (dead, next_attempt_at);
+            """)
+    
+    def url_error(self, url):
+        """Why url can't be a webhook target (None if it can) - every resolved address must be public"""
+        parsed = urlparse(url) if isinstance(url, str) else None
+        if parsed is None or parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            return "url must be an http(s) URL"
+        if self.allow_private_hosts:
+            return None
+        try:
+            addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, parsed.port or 443, proto=socket.IPPROTO_TCP)}
+        except (socket.gaierror, UnicodeError, ValueError) as e:
+            return f"Cannot resolve {parsed.hostname}: {e}"
+        for address in addresses:
+            ip = ipaddress.ip_address(address.split('%', 1)[0])
+            if getattr(ip, 'ipv4_mapped', None):
+                ip = ip.ipv4_mapped
+            if not ip.is_global or ip.is_multicast:
+                return f"{parsed.hostname} resolves to non-public address {ip}"
+        return None
+    
+    def subscribe(self, url, game_ids=None, secret=None):
+        with closing_sqlite(self.db_path) as conn:
+            cursor = conn.execute(
+                "INSERT INTO webhook_subscribers (url, game_ids, secret, created_at) VALUES (?, ?, ?, ?)",
+                (url, json.dumps([str(g) for g in game_ids]) if game_ids else None, secret, time.time())
+            )
+            return cursor.lastrowid
+    
+    def unsubscribe(self, subscriber_id):
+        with closing_sqlite(self.db_path) as conn:
+            conn.execute("DELETE FROM webhook_outbox WHERE subscriber_id = ?", (subscriber_id,))
+            return conn.execute("DELETE FROM webhook_subscribers WHERE id = ?", (subscriber_id,)).rowcount > 0
+    
+    def list_subscribers(self):
+        with closing_sqlite(self.db_path) as conn:
+            rows = conn.execute("SELECT id, url, game_ids, secret IS NOT NULL FROM webhook_subscribers ORDER BY id").fetchall()
+        return [{"id": row[0], "url": row[1], "game_ids": json.loads(row[2]) if row[2] else None,
+                 "signed": bool(row[3])} for row in rows]
+    
+    def enqueue(self, results):
+        """Write one outbox row per interested subscriber - durable before any delivery attempt"""
+        game_id = str(results.get("game_id"))
+        event = {
+            "event": "collection.completed",
+            "run_id": results.get("run_id"),
+            "game_id": game_id,
+            "end_time": results.get("end_time"),
+            "overall_success": results.get("overall_success"),
+            "authentication_method": results.get("authentication_method"),
+            "metrics": AnalyticsHistoryStore.metrics_from_results(results)
+        }
+        with closing_sqlite(self.db_path) as conn:
+            subscribers = conn.execute("SELECT id, game_ids FROM webhook_subscribers").fetchall()
+            targets = [sid for sid, game_ids in subscribers if not game_ids or game_id in json.loads(game_ids)]
+            conn.executemany(
+                "INSERT INTO webhook_outbox (subscriber_id, game_id, payload, next_attempt_at) VALUES (?, ?, ?, ?)",
+                [(sid, game_id, json.dumps(event), time.time()) for sid in targets]
+            )
+        if targets:
+            self._wake.set()
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._delivery_loop, name="webhook-delivery", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout=10):
+        """Stop the delivery thread after one last flush attempt, then close pooled connections"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.http.close()
+    
+    def _delivery_loop(self):
+        while not self._stop.is_set():
+            if self._wake.wait(self.POLL_SECONDS):
+                self._wake.clear()
+                # Give games finishing together a moment to land in the same batch
+                self._stop.wait(WEBHOOK_BATCH_WINDOW_SECONDS)
+            try:
+                self.deliver_due()
+            except Exception as e:
+                logger.error(f"❌ Webhook delivery loop error: {e}")
+    
+    def _claim_due(self):
+        """Atomically take due rows so concurrent workers never post the same event twice"""
+        now = time.time()
+        with closing_sqlite(self.db_path) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT o.id, o.subscriber_id, o.game_id, o.payload, o.attempts, s.url, s.secret "
+                "FROM webhook_outbox o JOIN webhook_subscribers s ON s.id = o.subscriber_id "
+                "WHERE o.dead = 0 AND o.next_attempt_at <= ? ORDER BY o.id", (now,)
+            ).fetchall()
+            conn.executemany("UPDATE webhook_outbox SET next_attempt_at = ? WHERE id = ?",
+                             [(now + self.CLAIM_SECONDS, row[0]) for row in rows])
+        return rows
+    
+    def deliver_due(self):
+        """POST one batch per subscriber, coalesced to the latest event per game"""
+        batches = {}
+        for row_id, subscriber_id, game_id, payload, attempts, url, secret in self._claim_due():
+            batch = batches.setdefault(subscriber_id, {"url": url, "secret": secret, "rows": [], "events": {}})
+            # Each row keeps its own attempt count - a fresh event must not inherit an old row's failures
+            batch["rows"].append((row_id, attempts))
+            batch["events"][game_id] = json.loads(payload)  # rows are in id order: latest wins
+        
+        for subscriber_id, batch in batches.items():
+            body = encode_json({"events": list(batch["events"].values()), "sent_at": datetime.now().isoformat()})
+            headers = {"Content-Type": "application/json"}
+            if batch["secret"]:
+                headers["X-Webhook-Signature"] = "sha256=" + hmac.new(
+                    batch["secret"].encode('utf-8'), body, hashlib.sha256).hexdigest()
+            try:
+                # Re-checked at send time: the name may resolve somewhere else than at registration
+                url_error = self.url_error(batch["url"])
+                if url_error:
+                    raise ValueError(url_error)
+                response = self.http.post(batch["url"], data=body, headers=headers, timeout=WEBHOOK_TIMEOUT_SECONDS,
+                                          allow_redirects=False)
+                response.raise_for_status()
+                if response.is_redirect:
+                    raise ValueError(f"Redirects are not followed (HTTP {response.status_code})")
+                self._mark_delivered([row_id for row_id, _ in batch["rows"]])
+                logger.info(f"📣 Delivered {len(batch['events'])} event(s) to webhook {subscriber_id}")
+            except Exception as e:
+                self._mark_failed(batch["rows"], str(e))
+                logger.warning(f"⚠️ Webhook {subscriber_id} delivery failed "
+                               f"(attempt {max(attempts for _, attempts in batch['rows']) + 1}): {e}")
+    
+    def _mark_delivered(self, ids):
+        with closing_sqlite(self.db_path) as conn:
+            conn.executemany("DELETE FROM webhook_outbox WHERE id = ?", [(row_id,) for row_id in ids])
+    
+    def _mark_failed(self, rows, error):
+        """rows are (id, attempts so far); exponential backoff from 5s capped at one hour, dead after WEBHOOK_MAX_ATTEMPTS"""
+        now = time.time()
+        updates = []
+        for row_id, attempts in rows:
+            attempts += 1
+            updates.append((attempts, now + min(3600, 5 * 2 ** (attempts - 1)),
+                            int(attempts >= WEBHOOK_MAX_ATTEMPTS), error[:500], row_id))
+        with closing_sqlite(self.db_path) as conn:
+            conn.executemany(
+                "UPDATE webhook_outbox SET attempts = ?, next_attempt_at = ?, dead = ?, last_error = ? WHERE id = ?",
+                updates
+            )
+    
+    def status(self):
+        with closing_sqlite(self.db_path) as conn:
+            pending, dead = conn.execute(
+                "SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 1), 0) FROM webhook_outbox").fetchone()
+        return {"subscribers": len(self.list_subscribers()), "pending": pending, "dead": dead}
+
+# 📦 Bounded in-memory result retention: compact records, debug payloads kept separately
+RESULT_HISTORY_PER_GAME = int(os.getenv('RESULT_HISTORY_PER_GAME', '100'))
+RESULT_HISTORY_MAX_GAMES = int(os.getenv('RESULT_HISTORY_MAX_GAMES', '50'))
+DEBUG_STORE_MAX_ENTRIES = int(os.getenv('DEBUG_STORE_MAX_ENTRIES', '20'))
+DEBUG_STORE_MAX_BYTES = int(os.getenv('DEBUG_STORE_MAX_BYTES', str(2 * 1024 * 1024)))
+
+class ResultRecord:
+    """📦 Fixed-size summary of one run - metric values in a float array, names shared per metric set"""
+    
+    __slots__ = ("run_id", "game_id", "end_time", "duration_seconds", "overall_success", "aborted",
+                 "authentication_method", "metric_names", "metric_values")
+    
+    # Identical metric-name tuples are stored once and shared by every record using them
+    _metric_name_sets = {}
+    
+    @classmethod
+    def from_results(cls, results):
+        return cls._build(results.get("run_id"), results.get("game_id"),
+                          datetime.fromisoformat(results["end_time"]).timestamp(), results.get("duration_seconds"),
+                          results.get("overall_success"), results.get("aborted"), results.get("authentication_method"),
+                          AnalyticsHistoryStore.metrics_from_results(results))
+    
+    @classmethod
+    def from_history(cls, run):
+        """Same record as from_results gave for a run persisted by AnalyticsHistoryStore.latest_run"""
+        return cls._build(run["run_id"], run["game_id"], run["collected_at"], run["duration_seconds"],
+                          run["overall_success"], run["aborted"], run["authentication_method"], run["metrics"])
+    
+    @classmethod
+    def _build(cls, run_id, game_id, end_time, duration_seconds, overall_success, aborted, authentication_method, metrics):
+        record = cls()
+        names = tuple(sorted(metrics))
+        record.run_id = run_id
+        record.game_id = sys.intern(str(game_id))
+        record.end_time = end_time
+        record.duration_seconds = float(duration_seconds or 0.0)
+        record.overall_success = bool(overall_success)
+        record.aborted = bool(aborted)
+        record.authentication_method = sys.intern(str(authentication_method))
+        record.metric_names = cls._metric_name_sets.setdefault(names, names)
+        record.metric_values = array('d', (metrics[name] for name in names))
+        return record
+    
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "game_id": self.game_id,
+            "end_time": datetime.fromtimestamp(self.end_time).isoformat(),
+            "duration_seconds": self.duration_seconds,
+            "overall_success": self.overall_success,
+            "aborted": self.aborted,
+            "authentication_method": self.authentication_method,
+            "metrics": dict(zip(self.metric_names, self.metric_values)),
+            "debug_url": f"/analytics/runs/{self.run_id}/debug"
+        }
+
+class ResultHistory:
+    """📦 Last N compact records per game, for at most M games (least recently updated evicted)"""
+    
+    def __init__(self, per_game=RESULT_HISTORY_PER_GAME, max_games=RESULT_HISTORY_MAX_GAMES):
+        self.per_game = per_game
+        self.max_games = max_games
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def add(self, record):
+        with self._lock:
+            records = self._games.pop(record.game_id, None) or deque(maxlen=self.per_game)
+            records.append(record)
+            self._games[record.game_id] = records
+            while len(self._games) > self.max_games:
+                self._games.popitem(last=False)
+    
+    def recent(self, game_id, limit=None):
+        """Newest first"""
+        with self._lock:
+            records = list(self._games.get(str(game_id), ()))
+        records.reverse()
+        return records[:limit] if limit else records
+
+class DebugStore:
+    """📦 Full result payloads (login details, tracebacks, analysis) - compressed, bounded by count and bytes"""
+    
+    def __init__(self, max_entries=DEBUG_STORE_MAX_ENTRIES, max_bytes=DEBUG_STORE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def put(self, run_id, payload):
+        blob = zlib.compress(encode_json(payload), 6)
+        with self._lock:
+            previous = self._entries.pop(run_id, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self._entries[run_id] = blob
+            self.total_bytes += len(blob)
+            while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+    
+    def get(self, run_id):
+        with self._lock:
+            blob = self._entries.get(run_id)
+        return None if blob is None else json.loads(zlib.decompress(blob))
+    
+    def status(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.total_bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+# 🔬 Per-run profiling (?profile=1) - summaries kept in a bounded store for comparison
+PROFILE_STORE_LIMIT = int(os.getenv('PROFILE_STORE_LIMIT', '20'))
+
+class RunProfiler:
+    """🔬 cProfile a collection and split wall time into WebDriver, HTTP, sleeps and Python work"""
+    
+    # category: (filename suffix, function name) whose cumulative time belongs to it
+    CATEGORIES = {
+        "webdriver_round_trips": ("selenium/webdriver/remote/remote_connection.py", "_request"),
+        "http_waits": ("requests/sessions.py", "request"),
+        "sleeps": ("~", "<built-in method time.sleep>"),
+    }
+    
+    def __init__(self, limit=PROFILE_STORE_LIMIT):
+        self.profiles = OrderedDict()
+        self.limit = limit
+        self._store_lock = threading.Lock()
+        # The interpreter allows one active cProfile at a time
+        self._active = threading.Lock()
+    
+    def run(self, func, top_n=15):
+        """Return (func(), summary) - summary is None if another profiled run is already active"""
+        if not self._active.acquire(blocking=False):
+            return func(), None
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                result = func()
+            finally:
+                profiler.disable()
+            total = time.perf_counter() - started
+        finally:
+            self._active.release()
+        return result, self.summarize(profiler, total, top_n)
+    
+    def summarize(self, profiler, total, top_n=15):
+        stats = pstats.Stats(profiler).stats
+        breakdown = {category: 0.0 for category in self.CATEGORIES}
+        calls = {category: 0 for category in self.CATEGORIES}
+        for (filename, _, function), (_, ncalls, _, cumtime, _) in stats.items():
+            for category, (suffix, name) in self.CATEGORIES.items():
+                if function == name and filename.replace('\\', '/').endswith(suffix):
+                    breakdown[category] += cumtime
+                    calls[category] += ncalls
+        
+        top = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top_n]
+        return {
+            "total_seconds": round(total, 3),
+            "breakdown_seconds": {
+                **{category: round(seconds, 3) for category, seconds in breakdown.items()},
+                "python_work": round(max(0.0, total - sum(breakdown.values())), 3)
+            },
+            "calls": calls,
+            "top_functions": [{
+                "function": f"{filename}:{lineno}({function})",
+                "calls": ncalls,
+                "tottime": round(tottime, 4),
+                "cumtime": round(cumtime, 4)
+            } for (filename, lineno, function), (_, ncalls, tottime, cumtime, _) in top]
+        }
+    
+    def store(self, run_id, game_id, summary):
+        with self._store_lock:
+            self.profiles[run_id] = {"run_id": run_id, "game_id": game_id,
+                                     "profiled_at": datetime.now().isoformat(), "profile": summary}
+            while len(self.profiles) > self.limit:
+                self.profiles.popitem(last=False)
+    
+    def get(self, run_id):
+        with self._store_lock:
+            return self.profiles.get(run_id)
+    
+    def list(self):
+        """Breakdowns only, oldest first, for side-by-side comparison"""
+        with self._store_lock:
+            return [{"run_id": entry["run_id"], "game_id": entry["game_id"], "profiled_at": entry["profiled_at"],
+                     "total_seconds": entry["profile"]["total_seconds"],
+                     "breakdown_seconds": entry["profile"]["breakdown_seconds"]}
+                    for entry in self.profiles.values()]
+
+# 🎞️ Record WebDriver traffic to JSONL for replay with webdriver_replay.py (unset = off)
+WEBDRIVER_RECORD_PATH = os.getenv('WEBDRIVER_RECORD_PATH')
+
+# 🔢 Max WebDriver round-trips per pipeline step ("total" = whole run); JSON env overrides entries.
+# Measured on tests/fixtures: login 20, qptr_extraction 4, total 29 - headroom covers selector fallbacks
+COMMAND_BUDGETS = {"login": 40, "qptr_extraction": 6, "total": 60}
+
+def _load_command_budgets(defaults):
+    """Defaults overlaid with WEBDRIVER_COMMAND_BUDGETS - a malformed value is logged, never fatal at boot"""
+    raw = os.getenv('WEBDRIVER_COMMAND_BUDGETS')
+    budgets = dict(defaults)
+    if not raw:
+        return budgets
+    try:
+        overrides = json.loads(raw)
+        if not isinstance(overrides, dict) or not all(isinstance(value, int) for value in overrides.values()):
+            raise ValueError("expected a JSON object of integer budgets")
+    except ValueError as e:
+        logger.error(f"❌ Ignoring WEBDRIVER_COMMAND_BUDGETS={raw!r}: {e}")
+        return budgets
+    budgets.update(overrides)
+    return budgets
+
+COMMAND_BUDGETS = _load_command_budgets(COMMAND_BUDGETS)
+
+# ♻️ Warm driver: keep one authenticated remote session between collections (opt-in).
+# The idle session stays open on the hub outside admission control, so only enable this
+# when the hub accepts BROWSER_SESSION_SLOTS + 1 concurrent sessions.
+WARM_DRIVER_ENABLED = os.getenv('WARM_DRIVER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+WARM_DRIVER_MAX_USES = int(os.getenv('WARM_DRIVER_MAX_USES', '20'))
+WARM_DRIVER_MAX_IDLE_SECONDS = float(os.getenv('WARM_DRIVER_MAX_IDLE_SECONDS', '600'))
+
+class DriverLease:
+    """♻️ One checkout of a driver; set authenticated once logged in so the next run can skip login"""
+    
+    __slots__ = ("driver", "authenticated", "reused", "warm")
+    
+    def __init__(self, driver, authenticated=False, reused=False, warm=True):
+        self.driver = driver
+        self.authenticated = authenticated
+        self.reused = reused
+        self.warm = warm
+    
+    def to_dict(self):
+        return {"warm": self.warm, "reused": self.reused, "authenticated_on_checkout": self.authenticated}
+
+class WarmDriverHolder:
+    """♻️ Single long-lived remote driver, health-checked before reuse and recycled by use count or idle time"""
+    
+    def __init__(self, factory, enabled=WARM_DRIVER_ENABLED, max_uses=WARM_DRIVER_MAX_USES,
+                 max_idle_seconds=WARM_DRIVER_MAX_IDLE_SECONDS):
+        self.factory = factory
+        self.enabled = enabled
+        self.max_uses = max_uses
+        self.max_idle_seconds = max_idle_seconds
+        # Held for the whole lease: a driver is one browser tab and can't serve two runs
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper = None
+        self.driver = None
+        self.authenticated = False
+        self.uses = 0
+        self.created_at = None
+        self.last_used = None
+        self.counters = {"created": 0, "reused": 0, "transient": 0, "recycled": 0, "health_check_failed": 0}
+    
+    def _count(self, name):
+        with self._stats_lock:
+            self.counters[name] += 1
+    
+    @contextmanager
+    def lease(self, deadline):
+        """Yield a DriverLease - the warm driver if free, otherwise a transient one quit on exit"""
+        if not self.enabled or not self._lock.acquire(blocking=False):
+            self._count("transient")
+            driver = self.factory(deadline)
+            try:
+                yield DriverLease(driver, warm=False)
+            finally:
+                self._quit(driver)
+            return
+        
+        try:
+            lease = self._checkout(deadline)
+            try:
+                yield lease
+            except BaseException:
+                # Mid-run failure leaves the page in an unknown state - don't hand it to the next run
+                self._discard("run failed")
+                raise
+            self.authenticated = lease.authenticated
+            self.uses += 1
+            self.last_used = time.monotonic()
+        finally:
+            self._lock.release()
+    
+    def _checkout(self, deadline):
+        if self.driver is not None:
+            reason = self._recycle_reason()
+            if reason:
+                self._count("recycled")
+                self._discard(reason)
+            elif not self._healthy():
+                self._count("health_check_failed")
+                self._discard("health check failed")
+        
+        if self.driver is not None:
+            reset_driver_timeouts(self.driver, deadline)
+            self._count("reused")
+            logger.info(f"♻️ Reusing warm driver (use {self.uses + 1}/{self.max_uses}, authenticated={self.authenticated})")
+            return DriverLease(self.driver, self.authenticated, reused=True)
+        
+        self.driver = self.factory(deadline)
+        self.authenticated = False
+        self.uses = 0
+        self.created_at = self.last_used = time.monotonic()
+        self._count("created")
+        return DriverLease(self.driver)
+    
+    def _recycle_reason(self):
+        if self.uses >= self.max_uses:
+            return f"reached {self.max_uses} uses"
+        if time.monotonic() - self.last_used > self.max_idle_seconds:
+            return f"idle over {self.max_idle_seconds:.0f}s"
+        return None
+    
+    def _healthy(self):
+        """One round-trip: proves the session is alive and whether it still carries the login cookie"""
+        try:
+            cookie = self.driver.get_cookie('.ROBLOSECURITY')
+        except Exception as e:
+            logger.warning(f"⚠️ Warm driver health check failed: {e}")
+            return False
+        if self.authenticated and not cookie:
+            logger.info("♻️ Warm driver lost its login cookie - will log in again")
+            self.authenticated = False
+        return True
+    
+    def _discard(self, reason):
+        if self.driver is not None:
+            logger.info(f"♻️ Closing warm driver: {reason}")
+            self._quit(self.driver)
+        self.driver = None
+        self.authenticated = False
+    
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def start(self):
+        """Reaper thread closes the idle driver so it doesn't hold a hub slot indefinitely"""
+        if not self.enabled or (self._reaper and self._reaper.is_alive()):
+            return
+        self._stop.clear()
+        self._reaper = threading.Thread(target=self._reap_loop, name="warm-driver-reaper", daemon=True)
+        self._reaper.start()
+    
+    def _reap_loop(self):
+        interval = max(5.0, min(60.0, self.max_idle_seconds / 4))
+        while not self._stop.wait(interval):
+            # A busy driver is in use, not idle - check again next round
+            if not self._lock.acquire(blocking=False):
+                continue
+            try:
+                if self.driver is not None and time.monotonic() - self.last_used > self.max_idle_seconds:
+                    self._count("recycled")
+                    self._discard(f"idle over {self.max_idle_seconds:.0f}s")
+            finally:
+                self._lock.release()
+    
+    def close(self):
+        self._stop.set()
+        if self._reaper:
+            self._reaper.join(timeout=5)
+        if self._lock.acquire(timeout=5):
+            try:
+                self._discard("shutdown")
+            finally:
+                self._lock.release()
+    
+    def status(self):
+        with self._stats_lock:
+            counters = dict(self.counters)
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "alive": self.driver is not None,
+            "authenticated": self.authenticated,
+            "uses": self.uses,
+            "max_uses": self.max_uses,
+            "age_seconds": round(now - self.created_at, 1) if self.driver is not None else None,
+            "idle_seconds": round(now - self.last_used, 1) if self.driver is not None else None,
+            "max_idle_seconds": self.max_idle_seconds,
+            "counters": counters
+        }
+
+# 🧩 Shared state: unset = per-process memory, redis://... = shared across workers/replicas
+STATE_BACKEND_URL = os.getenv('STATE_BACKEND_URL')
+STATE_NAMESPACE = os.getenv('STATE_NAMESPACE', 'roblox-analytics')
+RESULT_CACHE_TTL_SECONDS = int(os.getenv('RESULT_CACHE_TTL_SECONDS', '86400'))
+REGION_CACHE_TTL_SECONDS = int(os.getenv('REGION_CACHE_TTL_SECONDS', '3600'))
+
+class StateBackend(ABC):
+    """🧩 Key-value interface for cached results, session state and in-flight job locks"""
+    
+    @abstractmethod
+    def get(self, key):
+        """Decoded value, None if missing or expired"""
+    
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        """Store a JSON-serialisable value, expiring after ttl seconds if given"""
+    
+    @abstractmethod
+    def delete(self, key):
+        """Remove key if present"""
+    
+    @abstractmethod
+    def acquire_lock(self, key, ttl):
+        """Return an owner token if the lock was taken, None if someone else holds it"""
+    
+    @abstractmethod
+    def release_lock(self, key, token):
+        """Release only if still held by token"""
+    
+    @abstractmethod
+    def extend_lock(self, key, token, ttl):
+        """Push the expiry of a lock we still own, False if it was lost"""
+    
+    @abstractmethod
+    def is_locked(self, key):
+        """True while anyone holds the lock"""
+    
+    def close(self):
+        pass
+
+class InMemoryStateBackend(StateBackend):
+    """🧩 Single-process backend - values are stored JSON-encoded, like a networked store"""
+    
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+    
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        raw, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return raw
+    
+    def get(self, key):
+        with self._lock:
+            raw = self._live(key)
+        return None if raw is None else json.loads(raw)
+    
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (json.dumps(value, default=str), expires_at)
+    
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        with self._lock:
+            if self._live(key) is not None:
+                return None
+            self._data[key] = (json.dumps(token), time.monotonic() + ttl)
+        return token
+    
+    def release_lock(self, key, token):
+        with self._lock:
+            if self._live(key) == json.dumps(token):
+                del self._data[key]
+    
+    def extend_lock(self, key, token, ttl):
+        with self._lock:
+            if self._live(key) != json.dumps(token):
+                return False
+            self._data[key] = (json.dumps(token), time.monotonic() + ttl)
+            return True
+    
+    def is_locked(self, key):
+        with self._lock:
+            return self._live(key) is not None
+
+class RedisStateBackend(StateBackend):
+    """🧩 Networked backend shared by every worker and replica (pass client= to use a local stand-in)"""
+    
+    def __init__(self, url=None, namespace=STATE_NAMESPACE, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError(f"redis package required for STATE_BACKEND_URL={url} (Error: {str(e)})")
+            client = redis.Redis.from_url(url, socket_timeout=5, socket_connect_timeout=5)
+        self.client = client
+        self.namespace = namespace
+    
+    def _key(self, key):
+        return f"{self.namespace}:{key}"
+    
+    def get(self, key):
+        raw = self.client.get(self._key(key))
+        return None if raw is None else json.loads(raw)
+    
+    def set(self, key, value, ttl=None):
+        self.client.set(self._key(key), json.dumps(value, default=str), ex=int(ttl) if ttl else None)
+    
+    def delete(self, key):
+        self.client.delete(self._key(key))
+    
+    def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        if self.client.set(self._key(key), json.dumps(token), nx=True, px=int(ttl * 1000)):
+            return token
+        return None
+    
+    def _if_owner(self, key, token, action):
+        """Run action(pipe, key) only while key still holds token (WATCH/MULTI, no server scripting needed)"""
+        from redis.exceptions import WatchError
+        key = self._key(key)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.get(key)
+                # Clients built with decode_responses=True hand back str instead of bytes
+                if isinstance(current, bytes):
+                    current = current.decode('utf-8')
+                if current is None or current != json.dumps(token):
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                action(pipe, key)
+                pipe.execute()
+                return True
+            except WatchError:
+                return False
+    
+    def release_lock(self, key, token):
+        # Compare-and-delete so a run never releases a lock that expired and was re-taken
+        self._if_owner(key, token, lambda pipe, k: pipe.delete(k))
+    
+    def extend_lock(self, key, token, ttl):
+        return self._if_owner(key, token, lambda pipe, k: pipe.pexpire(k, int(ttl * 1000)))
+    
+    def is_locked(self, key):
+        return bool(self.client.exists(self._key(key)))
+    
+    def close(self):
+        self.client.close()
+
+def create_state_backend(url=None):
+    """Pick the state backend from STATE_BACKEND_URL"""
+    if not url:
+        return InMemoryStateBackend()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStateBackend(url)
+    raise ValueError(f"Unsupported STATE_BACKEND_URL scheme: {url}")
+
 class RobloxAnalytics:
     def __init__(self):
         self.username = "ByddyY8rPao2124"
@@ -346,25 +1597,84 @@ class RobloxAnalytics:
         self.last_login = None
         self.login_valid_hours = 2
         self.session_data = {}
-        self.last_results = {}
-        self.stored_roblosecurity = None
+        
+        # Results, session cookie and job locks live in the (possibly shared) state backend
+        self.state = create_state_backend(STATE_BACKEND_URL)
         
         # Remote Selenium URL - connecting to your existing Selenium service
-        self.selenium_url = "https://standalone-chrome-production-eb24.up.railway.app/wd/hub"
+        self.selenium_url = os.getenv('SELENIUM_URL', "https://standalone-chrome-production-eb24.up.railway.app/wd/hub")
         
         # Initialize components
         self.verification_solver = RobloxVerificationSolver()
         self.api_auth = RobloxAPIAuth(self.username, self.password)
+        self.history = AnalyticsHistoryStore(ANALYTICS_DB_PATH)
+        self.webhooks = WebhookDispatcher(ANALYTICS_DB_PATH)
+        self.result_history = ResultHistory()
+        self.debug_store = DebugStore()
+        self.profiler = RunProfiler()
+        self.warm_driver = WarmDriverHolder(self.create_remote_driver)
         
         logger.info(f"🎯 RobloxAnalytics initialized with Remote Selenium: {self.selenium_url}")
         logger.info(f"🔑 2Captcha API key configured: {self.verification_solver.api_key[:8]}...")
         logger.info(f"🌐 Enhanced authentication with regional detection enabled")
+        logger.info(f"🧩 State backend: {type(self.state).__name__}")
+    
+    @property
+    def last_results(self):
+        """Most recent collection result across all games"""
+        return self.state.get("results:latest") or {}
+    
+    @last_results.setter
+    def last_results(self, results):
+        """Cache the compact form only - heavyweight details live in the bounded debug store"""
+        self.state.set("results:latest", results, ttl=RESULT_CACHE_TTL_SECONDS)
+        if results.get("game_id") is not None:
+            self.cache_game_results(results)
+    
+    def cache_game_results(self, results):
+        """Cache one game's compact result under results:game:<id> with its content ETag"""
+        # Content hash computed once here, so conditional GETs never re-serialize the result
+        etag = hashlib.sha256(json.dumps(results, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:32]
+        game_key = f"results:game:{results['game_id']}"
+        self.state.set(game_key, {"etag": etag, "result": results}, ttl=RESULT_CACHE_TTL_SECONDS)
+        self.state.set(f"{game_key}:meta", {"etag": etag, "end_time": results.get("end_time")},
+                       ttl=RESULT_CACHE_TTL_SECONDS)
     
-    def detect_server_region(self):
+    def cached_results(self, game_id):
+        """Latest collection result for one game, from any worker/replica"""
+        entry = self.cached_results_entry(game_id)
+        return entry["result"] if entry else None
+    
+    def cached_results_entry(self, game_id):
+        """Latest result together with its content ETag"""
+        return self.state.get(f"results:game:{game_id}")
+    
+    def cached_results_meta(self, game_id):
+        """Just the ETag and end_time of the latest result - cheap to fetch for revalidation"""
+        return self.state.get(f"results:game:{game_id}:meta")
+    
+    @property
+    def stored_roblosecurity(self):
+        return self.state.get("session:roblosecurity")
+    
+    @stored_roblosecurity.setter
+    def stored_roblosecurity(self, cookie):
+        if cookie:
+            self.state.set("session:roblosecurity", cookie)
+        else:
+            self.state.delete("session:roblosecurity")
+    
+    def detect_server_region(self, timeout=10, use_cache=True):
         """🌐 FIXED: Detect server region with proper logic"""
         try:
+            # The egress IP rarely moves - reuse a recent detection
+            if use_cache:
+                cached = self.state.get("region_info")
+                if cached:
+                    return cached
+            
             # Get our public IP and region info
-            response = requests.get('https://ipapi.co/json/', timeout=10)
+            response = requests.get('https://ipapi.co/json/', timeout=timeout)
             if response.status_code == 200:
                 data = response.json()
                 country = data.get('country_code', 'Unknown')
@@ -387,6 +1697,7 @@ class RobloxAnalytics:
                 }
                 
                 logger.info(f"🌐 Server region detected: {country} ({'EU' if is_eu else 'Non-EU'})")
+                self.state.set("region_info", result, ttl=REGION_CACHE_TTL_SECONDS)
                 return result
             else:
                 logger.warning(f"⚠️ Region detection failed: {response.status_code}")
@@ -397,8 +1708,20 @@ class RobloxAnalytics:
             return {"country": "Unknown", "region": "Unknown", "is_eu": False, "will_trigger_gdpr": False}
 
     @contextmanager
-    def get_remote_driver(self):
-        """Create remote WebDriver with fixed configuration"""
+    def get_remote_driver(self, deadline=None):
+        """Create remote WebDriver with fixed configuration, quit when the block exits"""
+        driver = self.create_remote_driver(deadline)
+        try:
+            yield driver
+        finally:
+            try:
+                driver.quit()
+            except:
+                pass
+    
+    def create_remote_driver(self, deadline=None):
+        """Start a configured remote WebDriver session - the caller owns quitting it"""
+        deadline = deadline or CollectionDeadline()
         options = Options()
         
         # Essential options for Railway deployment
@@ -420,32 +1743,35 @@ class RobloxAnalytics:
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
         
+        deadline.check("driver_creation")
         driver = None
         try:
             logger.info(f"🌐 Connecting to remote Selenium: {self.selenium_url}")
+            # Every command is counted and timed; fixture capture also writes each exchange to JSONL
+            if WEBDRIVER_RECORD_PATH:
+                command_executor = RecordingRemoteConnection(self.selenium_url, WEBDRIVER_RECORD_PATH)
+            else:
+                command_executor = InstrumentedRemoteConnection(self.selenium_url, keep_alive=True)
             driver = webdriver.Remote(
-                command_executor=self.selenium_url,
+                command_executor=command_executor,
                 options=options
             )
             
-            # REDUCED timeouts to prevent hanging
-            driver.set_page_load_timeout(30)  # Reduced from 60
-            driver.implicitly_wait(10)       # Reduced from 15
+            # REDUCED timeouts to prevent hanging - and never longer than the run budget
+            reset_driver_timeouts(driver, deadline)
             
             # Remove automation indicators
             driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            yield driver
+            return driver
             
         except Exception as e:
             logger.error(f"❌ Remote driver error: {e}")
-            raise
-        finally:
             if driver:
                 try:
                     driver.quit()
                 except:
                     pass
+            raise
 
     def simple_cookie_removal(self, driver):
         """🍪 FIXED: Simple, non-aggressive cookie banner removal"""
@@ -505,8 +1831,9 @@ class RobloxAnalytics:
             logger.warning(f"Cookie removal error: {e}")
             return {"removed": 0, "clicked": 0}
 
-    def find_login_elements(self, driver):
+    def find_login_elements(self, driver, deadline=None):
         """🔍 FIXED: Enhanced login element detection with multiple fallback selectors"""
+        deadline = deadline or CollectionDeadline()
         try:
             # COMPREHENSIVE selector strategies for Roblox login form
             username_selectors = [
@@ -556,6 +1883,8 @@ class RobloxAnalytics:
             
             # Try to find username field
             for selector in username_selectors:
+                # Each miss can cost a full implicit wait - stop probing once the budget is gone
+                deadline.check("find_login_elements")
                 try:
                     username_field = driver.find_element(By.CSS_SELECTOR, selector)
                     if username_field.is_displayed() and username_field.is_enabled():
@@ -566,6 +1895,7 @@ class RobloxAnalytics:
             
             # Try to find password field
             for selector in password_selectors:
+                deadline.check("find_login_elements")
                 try:
                     password_field = driver.find_element(By.CSS_SELECTOR, selector)
                     if password_field.is_displayed() and password_field.is_enabled():
@@ -576,6 +1906,7 @@ class RobloxAnalytics:
             
             # Try to find login button
             for selector in button_selectors:
+                deadline.check("find_login_elements")
                 try:
                     login_button = driver.find_element(By.CSS_SELECTOR, selector)
                     if login_button.is_displayed() and login_button.is_enabled():
@@ -602,6 +1933,8 @@ class RobloxAnalytics:
                 "missing_elements": missing if not success else []
             }
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Login element detection error: {e}")
             return {"success": False, "error": str(e)}
@@ -619,7 +1952,7 @@ class RobloxAnalytics:
         
         for strategy_name, click_method in strategies:
             try:
-                logger.info(f"🎯 Attempting {strategy_name}...")
+                logger.debug(f"🎯 Attempting {strategy_name}...")
                 click_method()
                 time.sleep(1)
                 return True
@@ -629,26 +1962,28 @@ class RobloxAnalytics:
         
         return False
 
-    def login_to_roblox(self, driver):
+    def login_to_roblox(self, driver, deadline=None):
         """🔐 FIXED: Enhanced login process with all fixes applied"""
+        deadline = deadline or CollectionDeadline()
         try:
             start_time = datetime.now()
             logger.info("🔐 Starting FIXED login process...")
             
             # Step 1: Detect region
-            region_info = self.detect_server_region()
+            deadline.check("region_detection")
+            region_info = self.detect_server_region(timeout=deadline.timeout(10))
             
             # Step 2: Navigate to login page
             logger.info("📡 Navigating to Roblox login page...")
-            driver.get("https://www.roblox.com/login")
-            time.sleep(5)  # Reduced wait time
+            budgeted_get(driver, "https://www.roblox.com/login", deadline)
+            deadline.sleep(5, "login_page_settle")  # Reduced wait time
             
             # Step 3: Simple cookie removal (non-aggressive)
             cookie_result = self.simple_cookie_removal(driver)
             
             # Step 4: Find login elements with enhanced detection
             logger.info("🔍 Finding login form elements...")
-            elements = self.find_login_elements(driver)
+            elements = self.find_login_elements(driver, deadline)
             
             if not elements["success"]:
                 return {
@@ -704,7 +2039,7 @@ class RobloxAnalytics:
             
             # Step 7: Wait for response (reduced timeout)
             logger.info("⏳ Waiting for login response...")
-            time.sleep(8)  # Reduced from 15
+            deadline.sleep(8, "login_response")  # Reduced from 15
             
             # Step 8: Check result
             current_url = driver.current_url
@@ -716,11 +2051,11 @@ class RobloxAnalytics:
                 logger.info("🎯 Verification challenge detected...")
                 
                 # Handle verification with 2Captcha
-                verification_result = self.verification_solver.solve_roblox_verification(driver)
+                verification_result = self.verification_solver.solve_roblox_verification(driver, deadline)
                 
                 if verification_result.get("success"):
                     logger.info("✅ Verification solved successfully!")
-                    time.sleep(5)
+                    deadline.sleep(5, "post_verification")
                     
                     # Extract .ROBLOSECURITY cookie after successful verification
                     cookies = driver.get_cookies()
@@ -796,6 +2131,8 @@ class RobloxAnalytics:
                             "region_info": region_info
                         }
                         
+        except DeadlineExceeded:
+            raise
         except TimeoutException:
             logger.error("❌ Login timeout - page elements not found")
             return {
@@ -811,31 +2148,34 @@ class RobloxAnalytics:
                 "traceback": traceback.format_exc()
             }
 
-    def extract_qptr_data(self, driver, game_id="7291257156"):
+    def extract_qptr_data(self, driver, game_id="7291257156", deadline=None):
         """Extract QPTR data from analytics dashboard"""
+        deadline = deadline or CollectionDeadline()
         try:
             logger.info(f"📊 Extracting QPTR data for game {game_id}...")
             
             # Navigate to analytics page
             analytics_url = f"https://create.roblox.com/dashboard/creations/experiences/{game_id}/analytics"
-            driver.get(analytics_url)
-            time.sleep(8)
+            budgeted_get(driver, analytics_url, deadline)
+            deadline.sleep(8, "analytics_page_settle")
             
             # Simple QPTR extraction logic
             page_text = driver.find_element(By.TAG_NAME, "body").text
             
             # Look for QPTR-like patterns in the page
-            import re
-            qptr_patterns = [
-                r'(\d+\.?\d*)%',  # Any percentage
-                r'QPTR.*?(\d+\.?\d*)',  # QPTR followed by number
-                r'quality.*?(\d+\.?\d*)',  # Quality followed by number
-            ]
+            qptr_patterns = {
+                "percentage": r'(\d+\.?\d*)%',  # Any percentage
+                "qptr": r'QPTR.*?(\d+\.?\d*)',  # QPTR followed by number
+                "quality": r'quality.*?(\d+\.?\d*)',  # Quality followed by number
+            }
             
             extracted_values = []
-            for pattern in qptr_patterns:
+            metrics = {}  # First match per pattern, as a named numeric metric for history
+            for metric_name, pattern in qptr_patterns.items():
                 matches = re.findall(pattern, page_text, re.IGNORECASE)
                 extracted_values.extend(matches)
+                if matches:
+                    metrics[metric_name] = float(matches[0])
             
             return {
                 "success": True,
@@ -843,10 +2183,13 @@ class RobloxAnalytics:
                 "analytics_url": analytics_url,
                 "current_url": driver.current_url,
                 "extracted_values": extracted_values[:10],  # First 10 matches
+                "metrics": metrics,
                 "page_length": len(page_text),
                 "method": "ui_extraction"
             }
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"❌ QPTR extraction error: {e}")
             return {
@@ -1125,13 +2468,15 @@ class RobloxAnalytics:
             logger.error(f"❌ Credential validation error: {e}")
             return {"error": str(e)}
 
-    def get_authenticated_session(self, game_id="7291257156"):
+    def get_authenticated_session(self, game_id="7291257156", deadline=None):
         """🎯 Multi-strategy authentication approach"""
+        deadline = deadline or CollectionDeadline()
         try:
             # Strategy 1: Try API authentication if we have stored cookie
             if self.stored_roblosecurity:
                 logger.info("🔑 Attempting API authentication with stored cookie...")
-                api_success = self.api_auth.authenticate_via_api(self.stored_roblosecurity)
+                deadline.check("api_authentication")
+                api_success = self.api_auth.authenticate_via_api(self.stored_roblosecurity, timeout=deadline.timeout(10))
                 if api_success:
                     analytics_data = self.api_auth.get_analytics_data(game_id)
                     return {
@@ -1142,9 +2487,18 @@ class RobloxAnalytics:
             
             # Strategy 2: UI authentication with enhanced fixes
             logger.info("🔑 Using UI authentication with enhanced fixes...")
+            login_result = None
             try:
-                with self.get_remote_driver() as driver:
-                    login_result = self.login_to_roblox(driver)
+                with self.warm_driver.lease(deadline) as lease:
+                    driver = lease.driver
+                    if lease.authenticated:
+                        logger.info("♻️ Warm driver is still logged in - skipping login")
+                        login_result = {"success": True, "message": "Reused authenticated warm driver session",
+                                        "reused_session": True}
+                    else:
+                        with log_step("login", game_id=game_id):
+                            login_result = self.login_to_roblox(driver, deadline)
+                        lease.authenticated = bool(login_result.get("success"))
                     
                     if login_result.get("success"):
                         # Store cookie for future API use
@@ -1153,13 +2507,18 @@ class RobloxAnalytics:
                             logger.info("🔑 Stored cookie for future API authentication")
                         
                         # Extract QPTR data
-                        qptr_result = self.extract_qptr_data(driver, game_id)
+                        with log_step("qptr_extraction", game_id=game_id):
+                            qptr_result = self.extract_qptr_data(driver, game_id, deadline)
+                        if "login" in str(qptr_result.get("current_url", "")):
+                            # Bounced to the login page: the session expired server-side
+                            lease.authenticated = False
                         
                         return {
                             "success": True,
                             "method": "ui_authentication",
                             "login_result": login_result,
-                            "qptr_result": qptr_result
+                            "qptr_result": qptr_result,
+                            "driver_session": lease.to_dict()
                         }
                     else:
                         return {
@@ -1168,6 +2527,19 @@ class RobloxAnalytics:
                             "login_result": login_result
                         }
                         
+            except DeadlineExceeded as e:
+                # Hand back whatever finished so the caller can return partial results
+                logger.warning(f"⏱️ UI authentication stopped: {e}")
+                partial = {
+                    "success": False,
+                    "method": "ui_authentication_aborted",
+                    "deadline_exceeded": True,
+                    "aborted_step": e.step,
+                    "error": str(e)
+                }
+                if login_result is not None:
+                    partial["login_result"] = login_result
+                return partial
             except Exception as e:
                 logger.error(f"❌ UI authentication error: {str(e)}")
                 return {
@@ -1176,6 +2548,16 @@ class RobloxAnalytics:
                     "traceback": traceback.format_exc()
                 }
                 
+        except DeadlineExceeded as e:
+            # Budget ran out before the UI strategy started (API attempt or its timeout check)
+            logger.warning(f"⏱️ Authentication stopped: {e}")
+            return {
+                "success": False,
+                "method": "api_authentication_aborted",
+                "deadline_exceeded": True,
+                "aborted_step": e.step,
+                "error": str(e)
+            }
         except Exception as e:
             logger.error(f"❌ Authentication session error: {str(e)}")
             return {
@@ -1184,10 +2566,53 @@ class RobloxAnalytics:
                 "traceback": traceback.format_exc()
             }
 
-    def run_complete_analytics_collection(self, game_id="7291257156"):
+    def collect_with_dedup(self, game_id="7291257156", deadline=None, lane=None, cost=0):
+        """🔒 Run a collection unless one for this game is already in flight anywhere - then share its result
+        
+        With a lane, a browser slot is taken only by the request that owns the run (AdmissionRejected if none is free).
+        """
+        deadline = deadline or CollectionDeadline()
+        lock_key = f"lock:collection:{game_id}"
+        token = self.state.acquire_lock(lock_key, ttl=deadline.budget_seconds + 30)
+        
+        if token is not None:
+            try:
+                with admission.slot(lane, cost) if lane else nullcontext():
+                    return self.run_complete_analytics_collection(game_id, deadline)
+            finally:
+                self.state.release_lock(lock_key, token)
+        
+        logger.info(f"🔒 Collection for game {game_id} already in flight - waiting for its result")
+        while self.state.is_locked(lock_key) and deadline.remaining() > 2:
+            time.sleep(min(2, deadline.remaining() - 2))
+        
+        results = self.cached_results(game_id)
+        if self.state.is_locked(lock_key) or not results:
+            return {
+                "game_id": game_id,
+                "overall_success": False,
+                "aborted": True,
+                "in_flight_elsewhere": True,
+                "error": "Collection for this game is still running on another worker",
+                "deadline": deadline.to_dict()
+            }
+        # Same shape as the owner's response when the full payload is in this process's debug store;
+        # a run owned by another worker is only shared in its compact form
+        full_results = self.debug_store.get(results.get("run_id"))
+        if full_results is not None:
+            return dict(full_results, deduplicated=True)
+        return dict(results, deduplicated=True, compact=True)
+    
+    def run_complete_analytics_collection(self, game_id="7291257156", deadline=None):
         """🎯 Complete analytics collection with enhanced fixes"""
+        deadline = deadline or CollectionDeadline()
         start_time = datetime.now()
+        run_id = uuid.uuid4().hex[:12]
+        run_token = current_run_id.set(run_id)
+        command_stats = CommandStats()
+        command_stats_token = current_command_stats.set(command_stats)
         results = {
+            "run_id": run_id,
             "start_time": start_time.isoformat(),
             "game_id": game_id,
             "steps": {},
@@ -1195,24 +2620,36 @@ class RobloxAnalytics:
             "api_key_used": f"{self.verification_solver.api_key[:8]}...",
             "selenium_url": self.selenium_url,
             "region_detection": None,
-            "authentication_method": None
+            "authentication_method": None,
+            "aborted": False
         }
         
+        cache_result = False
         try:
             logger.info("🚀 Starting ENHANCED analytics collection...")
             
             # Step 1: Detect server region
             logger.info("Step 1: Detecting server region...")
-            region_info = self.detect_server_region()
+            deadline.check("region_detection")
+            with log_step("region_detection", game_id=game_id):
+                region_info = self.detect_server_region(timeout=deadline.timeout(10))
             results["region_detection"] = region_info
             results["steps"]["region_detection"] = {"success": True, "data": region_info}
             
             # Step 2: Enhanced authentication
             logger.info("Step 2: Enhanced authentication...")
-            auth_result = self.get_authenticated_session(game_id)
+            with log_step("authentication", game_id=game_id):
+                auth_result = self.get_authenticated_session(game_id, deadline)
             results["steps"]["authentication"] = auth_result
             results["authentication_method"] = auth_result.get("method", "unknown")
             
+            if auth_result.get("deadline_exceeded"):
+                logger.warning("⏱️ Collection aborted by deadline - returning partial results")
+                results["aborted"] = True
+                results["aborted_step"] = auth_result.get("aborted_step")
+                if auth_result.get("login_result"):
+                    results["steps"]["login"] = auth_result["login_result"]
+            
             if auth_result.get("success"):
                 logger.info("✅ Authentication successful!")
                 results["overall_success"] = True
@@ -1226,10 +2663,19 @@ class RobloxAnalytics:
                 logger.error("❌ Authentication failed")
                 results["overall_success"] = False
             
-            # Store results
-            self.last_results = results
+            # Store results (cached once end_time is known, below)
+            cache_result = True
             return results
                 
+        except DeadlineExceeded as e:
+            logger.warning(f"⏱️ Collection aborted by deadline: {e}")
+            results["overall_success"] = False
+            results["aborted"] = True
+            results["aborted_step"] = e.step
+            results["error"] = str(e)
+            cache_result = True
+            return results
+        
         except Exception as e:
             logger.error(f"❌ Complete analytics collection error: {str(e)}")
             results["overall_success"] = False
@@ -1241,11 +2687,654 @@ class RobloxAnalytics:
             end_time = datetime.now()
             results["end_time"] = end_time.isoformat()
             results["duration_seconds"] = (end_time - start_time).total_seconds()
-            logger.info(f"⏱️ Total duration: {results['duration_seconds']:.2f} seconds")
+            results["deadline"] = deadline.to_dict()
+            results["webdriver_commands"] = command_stats.to_dict(COMMAND_BUDGETS)
+            if results["webdriver_commands"]["budget_exceeded"]:
+                logger.warning(f"⚠️ WebDriver command budget exceeded: {results['webdriver_commands']['over_budget']}")
+            current_command_stats.reset(command_stats_token)
+            try:
+                self.history.record_run(results)
+            except Exception as history_error:
+                logger.warning(f"⚠️ Could not persist collection history: {history_error}")
+            record = None
+            try:
+                record = ResultRecord.from_results(results)
+                self.result_history.add(record)
+                self.debug_store.put(run_id, results)
+            except Exception as retention_error:
+                logger.warning(f"⚠️ Could not retain result in memory: {retention_error}")
+            if cache_result and record is not None:
+                self.last_results = record.to_dict()
+                try:
+                    self.webhooks.enqueue(results)
+                except Exception as webhook_error:
+                    logger.warning(f"⚠️ Could not queue webhook notifications: {webhook_error}")
+            logger.info(f"⏱️ Total duration: {results['duration_seconds']:.2f} seconds",
+                        extra={"step": "collection", "duration_ms": round(results["duration_seconds"] * 1000, 1),
+                               "game_id": game_id, "overall_success": results["overall_success"]})
+            current_run_id.reset(run_token)
 
 # Initialize analytics instance
 analytics = RobloxAnalytics()
 
+# 🚦 Admission control for endpoints that open a remote browser session.
+# Per worker - keep it below gunicorn's --threads so cheap reads always have a free thread
+BROWSER_SESSION_SLOTS = int(os.getenv('BROWSER_SESSION_SLOTS', '2'))
+
+class AdmissionRejected(Exception):
+    """Raised when a lane is out of tokens or browser slots"""
+    
+    def __init__(self, lane, reason, retry_after, status=429):
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status = status
+        super().__init__(f"{lane} lane rejected: {reason}")
+
+class TokenBucket:
+    """🪣 Thread-safe token bucket refilled continuously at `rate` tokens/second"""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self.tokens
+    
+    def try_take(self, cost):
+        """Take cost tokens, or return the seconds until they would be available"""
+        with self._lock:
+            self._refill()
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return True, 0.0
+            return False, (cost - self.tokens) / self.rate
+    
+    def refund(self, cost):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + cost)
+
+class AdmissionController:
+    """🚦 Priority lanes with their own token buckets, sharing a fixed number of browser slots"""
+    
+    # lane: bucket refill rate (tokens/s), burst capacity, slots kept free for higher-priority lanes
+    LANES = {
+        "scheduled": {"rate": 1.0, "capacity": 50, "reserve": 0},
+        "user": {"rate": 1 / 6, "capacity": 15, "reserve": 0},
+        "debug": {"rate": 1 / 12, "capacity": 8, "reserve": 1},
+    }
+    
+    def __init__(self, slots=BROWSER_SESSION_SLOTS):
+        self.slots = slots
+        self.buckets = {lane: TokenBucket(cfg["rate"], cfg["capacity"]) for lane, cfg in self.LANES.items()}
+        self.inflight = {lane: 0 for lane in self.LANES}
+        self.rejected = {lane: 0 for lane in self.LANES}
+        self.draining = False
+        self._lock = threading.Condition()
+    
+    def _reserve(self, lane):
+        # Never reserve every slot - a lane must always be able to run something
+        return min(self.LANES[lane]["reserve"], self.slots - 1)
+    
+    def admit(self, lane, cost=1):
+        """Take a browser slot for lane or raise AdmissionRejected immediately - pair with release()"""
+        self.charge(lane, cost)
+        self.occupy(lane, refund=cost)
+    
+    def charge(self, lane, cost=1):
+        """Rate limit only: take cost tokens from the lane's bucket or raise AdmissionRejected"""
+        if self.draining:
+            raise AdmissionRejected(lane, "worker is shutting down", 5.0, status=503)
+        admitted, retry_after = self.buckets[lane].try_take(cost)
+        if not admitted:
+            with self._lock:
+                self.rejected[lane] += 1
+            raise AdmissionRejected(lane, "rate limit exceeded", retry_after)
+    
+    def occupy(self, lane, refund=0):
+        """Take a browser slot (tokens already charged) or raise AdmissionRejected - pair with release()"""
+        with self._lock:
+            if sum(self.inflight.values()) >= self.slots - self._reserve(lane):
+                self.rejected[lane] += 1
+                self.buckets[lane].refund(refund)
+                raise AdmissionRejected(lane, "all browser sessions busy", 5.0)
+            self.inflight[lane] += 1
+    
+    def release(self, lane):
+        with self._lock:
+            self.inflight[lane] -= 1
+            self._lock.notify_all()
+    
+    def wait_idle(self, timeout):
+        """Block until no lane holds a browser slot, True if that happened within timeout"""
+        with self._lock:
+            return self._lock.wait_for(lambda: sum(self.inflight.values()) == 0, timeout)
+    
+    @contextmanager
+    def slot(self, lane, cost=1):
+        """Hold a browser slot for the duration of the block"""
+        self.admit(lane, cost)
+        try:
+            yield
+        finally:
+            self.release(lane)
+    
+    def status(self):
+        with self._lock:
+            return {
+                "browser_slots": self.slots,
+                "draining": self.draining,
+                "inflight": dict(self.inflight),
+                "rejected": dict(self.rejected),
+                "tokens": {lane: round(bucket.available(), 2) for lane, bucket in self.buckets.items()}
+            }
+
+admission = AdmissionController()
+
+# Browser-backed endpoints: (lane, token cost) - cheap read endpoints are deliberately not listed
+ENDPOINT_ADMISSION = {
+    "trigger_diagnostic": ("user", 5),
+    "login_test_endpoint": ("user", 3),
+    "debug_login_with_screenshots": ("debug", 3),
+    "debug_enhanced_login": ("debug", 4),
+}
+# Only charged on entry: collect_with_dedup takes the slot once it owns the run, so a request
+# that just waits for another worker's collection doesn't hold a browser slot while it polls
+DEFERRED_SLOT_ENDPOINTS = {"trigger_diagnostic"}
+
+def admission_controlled(view):
+    """Fast 429 (503 while draining) with Retry-After when the endpoint's lane cannot admit it"""
+    lane, cost = ENDPOINT_ADMISSION[view.__name__]
+    deferred = view.__name__ in DEFERRED_SLOT_ENDPOINTS
+    
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            if deferred:
+                admission.charge(lane, cost)
+                try:
+                    return view(*args, **kwargs)
+                except AdmissionRejected:
+                    admission.buckets[lane].refund(cost)  # no slot was free - the run never started
+                    raise
+            admission.admit(lane, cost)
+        except AdmissionRejected as e:
+            logger.warning(f"🚦 Rejected {request.path}: {e}")
+            response = jsonify({
+                "success": False,
+                "error": f"Too many requests - {e.reason}",
+                "lane": lane,
+                "retry_after_seconds": round(e.retry_after, 1)
+            })
+            response.status_code = e.status
+            response.headers['Retry-After'] = str(max(1, int(e.retry_after + 0.999)))
+            return response
+        try:
+            return view(*args, **kwargs)
+        finally:
+            admission.release(lane)
+    return wrapper
+
+# 👑 Scheduled refreshes - only the node holding the leader lease runs them
+REFRESH_GAME_IDS = [game_id.strip() for game_id in os.getenv('REFRESH_GAME_IDS', '').split(',') if game_id.strip()]
+REFRESH_INTERVAL_SECONDS = int(os.getenv('REFRESH_INTERVAL_SECONDS', '1800'))
+LEADER_LEASE_SECONDS = int(os.getenv('LEADER_LEASE_SECONDS', '60'))
+
+class SQLiteLease:
+    """👑 Lease row in the local SQLite file - elects one leader among workers on a host"""
+    
+    def __init__(self, db_path, name, ttl):
+        self.db_path = db_path
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        with closing_sqlite(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+    
+    def try_acquire(self):
+        """Take the lease if free or expired, renew it if already ours"""
+        now = time.time()
+        with closing_sqlite(self.db_path) as conn:
+            conn.execute("""
+                INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+            """, (self.name, self.holder, now + self.ttl, now))
+            row = conn.execute("SELECT holder FROM leases WHERE name = ?", (self.name,)).fetchone()
+        return row is not None and row[0] == self.holder
+    
+    def release(self):
+        with closing_sqlite(self.db_path) as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+
+class StateBackendLease:
+    """👑 Lease kept as an expiring lock in the shared state backend - elects one leader across replicas"""
+    
+    def __init__(self, state, name, ttl):
+        self.state = state
+        self.key = f"lease:{name}"
+        self.ttl = ttl
+        self.token = None
+    
+    def try_acquire(self):
+        if self.token and self.state.extend_lock(self.key, self.token, self.ttl):
+            return True
+        self.token = self.state.acquire_lock(self.key, self.ttl)
+        return self.token is not None
+    
+    def release(self):
+        if self.token:
+            self.state.release_lock(self.key, self.token)
+            self.token = None
+
+def create_leader_lease(state, name="scheduler", lease_seconds=LEADER_LEASE_SECONDS):
+    """Shared KV lease when state is networked, SQLite file lease otherwise"""
+    # Expiry at 2/3 of the period with renewals every 1/3: a dead leader is replaced within one period
+    ttl = lease_seconds * 2 / 3
+    if isinstance(state, InMemoryStateBackend):
+        return SQLiteLease(ANALYTICS_DB_PATH, name, ttl)
+    return StateBackendLease(state, name, ttl)
+
+class ScheduledRefresher:
+    """🔄 Periodic collections for configured games, executed only while holding the leader lease"""
+    
+    def __init__(self, analytics, lease, game_ids, interval_seconds, lease_seconds=LEADER_LEASE_SECONDS):
+        self.analytics = analytics
+        self.lease = lease
+        self.game_ids = list(game_ids)
+        self.interval_seconds = interval_seconds
+        self.heartbeat_seconds = lease_seconds / 3
+        self.is_leader = False
+        self.last_run_at = None
+        self._stop = threading.Event()
+        self._threads = []
+    
+    def start(self):
+        # Heartbeat runs apart from collections so a long run never lets the lease lapse
+        self._threads = [
+            threading.Thread(target=self._heartbeat_loop, name="lease-heartbeat", daemon=True),
+            threading.Thread(target=self._collection_loop, name="scheduled-refresh", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"🔄 Scheduled refresher started for games {self.game_ids} every {self.interval_seconds}s")
+    
+    def stop(self):
+        self._stop.set()
+        if self.is_leader:
+            try:
+                self.lease.release()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not release leader lease: {e}")
+        self.is_leader = False
+    
+    def _heartbeat_loop(self):
+        while not self._stop.is_set():
+            try:
+                leader = self.lease.try_acquire()
+            except Exception as e:
+                logger.warning(f"⚠️ Leader lease check failed: {e}")
+                leader = False
+            if leader != self.is_leader:
+                logger.info("👑 Became scheduler leader" if leader else "👥 Lost scheduler leadership - serving cached data only")
+            self.is_leader = leader
+            self._stop.wait(self.heartbeat_seconds)
+    
+    def _is_due(self, game_id):
+        """Due when no run newer than one interval is recorded - survives failover
+        
+        The history file is shared by every worker on the host (the SQLiteLease case); the state
+        backend cache covers leaders on other hosts when it is Redis.
+        """
+        last_run_at = self.analytics.history.last_collected_at(game_id)
+        cached = self.analytics.cached_results(game_id) or {}
+        if cached.get("end_time"):
+            cached_at = datetime.fromisoformat(cached["end_time"]).timestamp()
+            last_run_at = max(last_run_at or 0, cached_at)
+        if last_run_at is None:
+            return True
+        return time.time() - last_run_at >= self.interval_seconds
+    
+    def _collection_loop(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            if not self.is_leader:
+                continue
+            for game_id in self.game_ids:
+                if self._stop.is_set() or not self.is_leader:
+                    break
+                if not self._is_due(game_id):
+                    continue
+                try:
+                    logger.info(f"🔄 Scheduled collection for game {game_id}")
+                    self.analytics.collect_with_dedup(game_id, CollectionDeadline(), lane="scheduled", cost=5)
+                    self.last_run_at = datetime.now()
+                except AdmissionRejected as e:
+                    logger.info(f"🚦 Scheduled collection deferred: {e}")
+                    break
+                except Exception as e:
+                    logger.error(f"❌ Scheduled collection failed for game {game_id}: {e}")
+    
+    def status(self):
+        return {
+            "enabled": True,
+            "is_leader": self.is_leader,
+            "game_ids": self.game_ids,
+            "interval_seconds": self.interval_seconds,
+            "lease": type(self.lease).__name__,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None
+        }
+
+# 🔥 Optional warm-up after boot: region cache, session state and latest results
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+WARMUP_GAME_IDS = [game_id.strip() for game_id in os.getenv('WARMUP_GAME_IDS', '').split(',') if game_id.strip()] \
+    or REFRESH_GAME_IDS
+
+class WarmupRunner:
+    """🔥 Primes caches in the background so the first real request lands on a warm worker"""
+    
+    def __init__(self, analytics, game_ids):
+        self.analytics = analytics
+        self.game_ids = list(game_ids)
+        self.ready = threading.Event()
+        self.steps = {}
+        self.started_at = None
+        self.finished_at = None
+    
+    def start(self):
+        self.started_at = datetime.now()
+        threading.Thread(target=self._run, name="warmup", daemon=True).start()
+    
+    def _step(self, name, action):
+        started = time.perf_counter()
+        try:
+            detail = action()
+            self.steps[name] = {"success": True, "detail": detail}
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up step {name} failed: {e}")
+            self.steps[name] = {"success": False, "error": str(e)}
+        self.steps[name]["duration_seconds"] = round(time.perf_counter() - started, 3)
+    
+    def _verify_session(self):
+        cookie = self.analytics.stored_roblosecurity
+        if not cookie:
+            return "no stored session"
+        return "valid" if self.analytics.api_auth.authenticate_via_api(cookie) else "invalid"
+    
+    def _prime_results(self, game_id):
+        if self.analytics.cached_results(game_id):
+            return "already cached"
+        # The newest run is persisted - restore it rather than open a browser on every worker boot
+        run = self.analytics.history.latest_run(game_id)
+        if run and time.time() - run["collected_at"] < RESULT_CACHE_TTL_SECONDS:
+            self.analytics.cache_game_results(ResultRecord.from_history(run).to_dict())
+            return "restored from history"
+        result = self.analytics.collect_with_dedup(game_id, CollectionDeadline(), lane="scheduled", cost=5)
+        return "collected" if result.get("overall_success") else "collection failed"
+    
+    def _run(self):
+        logger.info(f"🔥 Warm-up started (games: {self.game_ids})")
+        try:
+            self._step("region_cache", lambda: self.analytics.detect_server_region().get("country"))
+            self._step("session_state", self._verify_session)
+            for game_id in self.game_ids:
+                self._step(f"results:{game_id}", lambda game_id=game_id: self._prime_results(game_id))
+        finally:
+            # Done means attempted - a failed step must not keep the worker out of rotation forever
+            self.finished_at = datetime.now()
+            self.ready.set()
+            logger.info(f"🔥 Warm-up finished in {(self.finished_at - self.started_at).total_seconds():.1f}s")
+    
+    def status(self):
+        return {
+            "enabled": True,
+            "ready": self.ready.is_set(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "steps": dict(self.steps)
+        }
+
+warmup = WarmupRunner(analytics, WARMUP_GAME_IDS) if WARMUP_ENABLED else None
+
+# 🧠 Opt-in memory profiling - tracemalloc snapshots/diffs and an RSS time series
+MEMORY_PROFILING_ENABLED = os.getenv('MEMORY_PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+MEMORY_SNAPSHOT_LIMIT = int(os.getenv('MEMORY_SNAPSHOT_LIMIT', '10'))
+RSS_SAMPLE_SECONDS = float(os.getenv('RSS_SAMPLE_SECONDS', '30'))
+
+def current_rss_bytes():
+    """Resident set size now (Linux /proc), falling back to peak RSS elsewhere"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class MemoryProfiler:
+    """🧠 Named tracemalloc snapshots, top-N allocation diffs and RSS samples for this worker"""
+    
+    def __init__(self, snapshot_limit=MEMORY_SNAPSHOT_LIMIT, sample_seconds=RSS_SAMPLE_SECONDS, samples_kept=240):
+        self.snapshot_limit = snapshot_limit
+        self.sample_seconds = sample_seconds
+        self.snapshots = OrderedDict()
+        self.rss_samples = deque(maxlen=samples_kept)
+        self._lock = threading.Lock()
+        self._sampler_pid = None
+    
+    def start_rss_sampler(self):
+        if self._sampler_pid == os.getpid():
+            return
+        self._sampler_pid = os.getpid()
+        threading.Thread(target=self._sample_loop, name="rss-sampler", daemon=True).start()
+    
+    def _sample_loop(self):
+        while True:
+            self.rss_samples.append({"at": datetime.now().isoformat(), "rss_bytes": current_rss_bytes()})
+            time.sleep(self.sample_seconds)
+    
+    def start(self, frames=1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+    
+    def stop(self):
+        with self._lock:
+            self.snapshots.clear()
+        tracemalloc.stop()
+    
+    @staticmethod
+    def _filtered_snapshot():
+        """Fresh snapshot without tracemalloc's own allocations (stored snapshots live there)"""
+        if not tracemalloc.is_tracing():
+            raise ValueError("tracemalloc is not running - POST /debug/memory/start first")
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+    
+    def take_snapshot(self, name):
+        snapshot = self._filtered_snapshot()
+        with self._lock:
+            self.snapshots.pop(name, None)
+            self.snapshots[name] = {"snapshot": snapshot, "taken_at": datetime.now().isoformat(),
+                                    "rss_bytes": current_rss_bytes()}
+            # Snapshots are large themselves - keep only the newest few
+            while len(self.snapshots) > self.snapshot_limit:
+                self.snapshots.popitem(last=False)
+        return {"name": name, "taken_at": self.snapshots[name]["taken_at"],
+                "traced_bytes": sum(stat.size for stat in snapshot.statistics('filename'))}
+    
+    def _get(self, name):
+        with self._lock:
+            if name not in self.snapshots:
+                raise KeyError(f"Unknown snapshot '{name}'")
+            return self.snapshots[name]["snapshot"]
+    
+    def diff(self, from_name, to_name=None, key_type='lineno', limit=20):
+        """Top allocation growth between two snapshots (to_name=None compares against a fresh one)"""
+        before = self._get(from_name)
+        after = self._get(to_name) if to_name else self._filtered_snapshot()
+        stats = after.compare_to(before, key_type)
+        return [{
+            "location": str(stat.traceback[0]),
+            "size_diff_bytes": stat.size_diff,
+            "size_bytes": stat.size,
+            "count_diff": stat.count_diff,
+            "count": stat.count
+        } for stat in stats[:limit]]
+    
+    def status(self):
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        with self._lock:
+            snapshots = [{"name": name, "taken_at": entry["taken_at"], "rss_bytes": entry["rss_bytes"]}
+                         for name, entry in self.snapshots.items()]
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "rss_bytes": current_rss_bytes(),
+            "rss_samples": list(self.rss_samples),
+            "snapshots": snapshots
+        }
+
+memory_profiler = MemoryProfiler() if MEMORY_PROFILING_ENABLED else None
+
+refresher = None
+_background_services_pid = None
+
+def start_background_services():
+    """Start per-process background threads once - in each gunicorn worker, never in the master"""
+    global refresher, _background_services_pid
+    if _background_services_pid == os.getpid():
+        return
+    _background_services_pid = os.getpid()
+    
+    analytics.webhooks.start()
+    analytics.warm_driver.start()
+    
+    if warmup is not None:
+        warmup.start()
+    
+    if memory_profiler is not None:
+        memory_profiler.start_rss_sampler()
+    
+    if REFRESH_GAME_IDS:
+        refresher = ScheduledRefresher(
+            analytics,
+            create_leader_lease(analytics.state),
+            REFRESH_GAME_IDS,
+            REFRESH_INTERVAL_SECONDS
+        )
+        refresher.start()
+
+# 🛑 Graceful shutdown: stop admitting collections, drain in-flight runs, flush and close
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv('SHUTDOWN_DRAIN_SECONDS', '25'))  # under gunicorn's 30s graceful_timeout
+
+class ShutdownCoordinator:
+    """🛑 SIGTERM/exit handling that drains browser runs before the worker goes away"""
+    
+    def __init__(self, drain_seconds=SHUTDOWN_DRAIN_SECONDS):
+        self.drain_seconds = drain_seconds
+        self.installed_pid = None
+        self._previous_handler = None
+        self._drained = threading.Event()
+        self._drain_started = False
+        self._lock = threading.Lock()
+    
+    def install(self):
+        """Install the SIGTERM handler in this worker, chaining to whatever was there (gunicorn's own).
+        Must run on the main thread after gunicorn's signal setup - see gunicorn.conf.py post_worker_init"""
+        self.installed_pid = os.getpid()
+        try:
+            self._previous_handler = signal.signal(signal.SIGTERM, self._handle_sigterm)
+        except ValueError:
+            # Not on the main thread - atexit still drains and flushes
+            logger.warning("⚠️ SIGTERM handler not installed outside the main thread")
+    
+    def _handle_sigterm(self, signum, frame):
+        if self._drained.is_set():
+            # Second delivery, after draining: hand over to the original handler
+            previous = self._previous_handler
+            if callable(previous):
+                previous(signum, frame)
+            else:
+                # Default action terminates without atexit - write out queued log records first
+                _stop_log_listener()
+                signal.signal(signum, previous if previous is not None else signal.SIG_DFL)
+                os.kill(os.getpid(), signum)
+            return
+        logger.info("🛑 SIGTERM received - draining in-flight collections")
+        # Drain off the main thread: a sync worker may be inside the very request we wait for
+        threading.Thread(target=self._drain_then_resignal, args=(signum,), name="shutdown-drain", daemon=True).start()
+    
+    def _drain_then_resignal(self, signum):
+        self.drain_and_flush()
+        os.kill(os.getpid(), signum)
+    
+    def drain_and_flush(self):
+        """Idempotent: reject new runs, wait for running ones, then flush state and close pools"""
+        with self._lock:
+            if self._drain_started:
+                self._drained.wait(self.drain_seconds + 10)
+                return
+            self._drain_started = True
+        try:
+            admission.draining = True
+            started = time.monotonic()
+            if admission.wait_idle(self.drain_seconds):
+                logger.info(f"🛑 In-flight runs drained in {time.monotonic() - started:.1f}s")
+            else:
+                logger.warning(f"⚠️ Drain budget of {self.drain_seconds}s exhausted with runs still in flight: {admission.status()['inflight']}")
+            self._flush()
+        finally:
+            self._drained.set()
+    
+    def _flush(self):
+        # History and outbox rows are committed synchronously; this stops the threads that
+        # still hold work, sends what the outbox can deliver now and closes pooled connections
+        steps = [
+            ("scheduled refresher", lambda: refresher.stop() if refresher else None),
+            ("webhook delivery", analytics.webhooks.stop),
+            ("warm driver", analytics.warm_driver.close),
+            ("state backend", analytics.state.close),
+            ("API session", analytics.api_auth.session.close),
+        ]
+        for name, step in steps:
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"⚠️ Shutdown step '{name}' failed: {e}")
+        logger.info("🛑 Shutdown flush complete")
+
+shutdown = ShutdownCoordinator()
+# --max-requests recycling exits without a signal - drain on interpreter exit as well.
+# Registered after the log listener, so it runs first and its records still get written.
+atexit.register(shutdown.drain_and_flush)
+
+# With --preload the app is imported in the master: start services after fork in each worker,
+# otherwise lazily on the first request the worker sees
+os.register_at_fork(after_in_child=start_background_services)
+
+@app.before_request
+def ensure_background_services():
+    """Lazy start for workers that imported the app themselves (no --preload)"""
+    if _background_services_pid != os.getpid():
+        start_background_services()
+
 # 📸 Screenshot viewer endpoints
 @app.route('/view-screenshot/<path:screenshot_data>')
 def view_screenshot(screenshot_data):
@@ -1320,14 +3409,47 @@ def status():
             "✅ Fixed JavaScript errors",
             "✅ All tests consolidated"
         ],
+        "scheduler": refresher.status() if refresher else {"enabled": False},
+        "admission": admission.status(),
+        "warm_driver": analytics.warm_driver.status(),
         "timestamp": datetime.now().isoformat()
     })
 
+def _prometheus_lines(name, help_text, kind, samples):
+    """Text exposition for one metric family; samples are (labels dict, value)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return lines
+
+@app.route('/metrics')
+def metrics():
+    """📈 Prometheus-style counters for this worker process"""
+    warm = analytics.warm_driver.status()
+    lines = []
+    lines += _prometheus_lines("roblox_webdriver_sessions_total",
+                               "WebDriver checkouts by outcome (created, reused, transient)", "counter",
+                               [({"outcome": outcome}, warm["counters"][outcome])
+                                for outcome in ("created", "reused", "transient")])
+    lines += _prometheus_lines("roblox_webdriver_recycles_total",
+                               "Warm driver sessions closed by reason", "counter",
+                               [({"reason": "recycled"}, warm["counters"]["recycled"]),
+                                ({"reason": "health_check_failed"}, warm["counters"]["health_check_failed"])])
+    lines += _prometheus_lines("roblox_webdriver_warm_alive", "1 if a warm driver session is open", "gauge",
+                               [({}, int(warm["alive"]))])
+    commands = process_command_stats.to_dict()["per_command"]
+    lines += _prometheus_lines("roblox_webdriver_commands_total", "WebDriver commands sent to the hub", "counter",
+                               [({"command": name}, entry["count"]) for name, entry in commands.items()])
+    lines += _prometheus_lines("roblox_webdriver_command_seconds_total", "Hub round-trip time per WebDriver command",
+                               "counter", [({"command": name}, entry["seconds"]) for name, entry in commands.items()])
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
 @app.route('/debug-region', methods=['POST'])
 def debug_region():
     """Debug region detection"""
     try:
-        region_info = analytics.detect_server_region()
+        region_info = analytics.detect_server_region(use_cache=False)
         return jsonify({
             "success": True,
             "region_detection": region_info,
@@ -1338,6 +3460,7 @@ def debug_region():
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/debug-login-with-screenshots', methods=['POST'])
+@admission_controlled
 def debug_login_with_screenshots():
     """Enhanced debug with visual analysis"""
     try:
@@ -1415,7 +3538,7 @@ def debug_login_with_screenshots():
             debug_results["overall_success"] = len(cookie_elements) == 0 or cookie_result.get("removed", 0) > 0
             debug_results["end_time"] = datetime.now().isoformat()
             
-            return jsonify(debug_results)
+            return fast_json_response(debug_results)
             
     except Exception as e:
         logger.error(f"❌ Enhanced debug failed: {str(e)}")
@@ -1457,6 +3580,7 @@ def check_credentials_simple():
     })
 
 @app.route('/debug-enhanced-login', methods=['POST'])
+@admission_controlled
 def debug_enhanced_login():
     """🔍 Enhanced login debugging with detailed form analysis"""
     try:
@@ -1475,7 +3599,7 @@ def debug_enhanced_login():
             debug_result["selenium_url"] = analytics.selenium_url
             debug_result["timestamp"] = datetime.now().isoformat()
             
-            return jsonify(debug_result)
+            return fast_json_response(debug_result)
             
     except Exception as e:
         return jsonify({
@@ -1508,19 +3632,25 @@ def test_credentials():
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/login-test', methods=['POST'])
+@admission_controlled
 def login_test_endpoint():
     """Test the fixed login process"""
     try:
-        with analytics.get_remote_driver() as driver:
-            result = analytics.login_to_roblox(driver)
+        deadline = CollectionDeadline()
+        with analytics.get_remote_driver(deadline) as driver:
+            result = analytics.login_to_roblox(driver, deadline)
             result["api_key_used"] = f"{analytics.verification_solver.api_key[:8]}..."
             result["selenium_url"] = analytics.selenium_url
             result["version"] = "8.2.0 - Complete Final Implementation"
+            result["deadline"] = deadline.to_dict()
             return jsonify(result)
+    except DeadlineExceeded as e:
+        return jsonify({"success": False, "error": str(e), "deadline_exceeded": True, "aborted_step": e.step}), 504
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/trigger-diagnostic', methods=['POST'])
+@admission_controlled
 def trigger_diagnostic():
     """Enhanced diagnostic with complete fixes"""
     try:
@@ -1537,9 +3667,27 @@ def trigger_diagnostic():
         logger.info(f"🎮 Game ID: {game_id}")
         logger.info(f"🔧 All critical fixes and enhancements included")
         
-        result = analytics.run_complete_analytics_collection(game_id)
-        return jsonify(result)
+        # One deadline per request, shared by every step of the run
+        deadline = CollectionDeadline()
+        lane = ENDPOINT_ADMISSION["trigger_diagnostic"][0]
+        collect = lambda: analytics.collect_with_dedup(game_id, deadline, lane=lane)
+        
+        if request.args.get('profile', '').lower() in ('1', 'true', 'yes'):
+            result, summary = analytics.profiler.run(collect)
+            if summary is None:
+                result["profile"] = {"skipped": "another profiled run is active"}
+            elif result.get("deduplicated") or result.get("in_flight_elsewhere"):
+                # This request only waited on another run - its profile is a wait loop, not that run's
+                result["profile"] = dict(summary, stored=False, note="profile covers waiting for another run")
+            else:
+                result["profile"] = summary
+                analytics.profiler.store(result.get("run_id"), game_id, summary)
+        else:
+            result = collect()
+        return fast_json_response(result)
         
+    except AdmissionRejected:
+        raise  # answered as 429 by admission_controlled
     except Exception as e:
         logger.error(f"❌ Complete diagnostic error: {str(e)}")
         return jsonify({
@@ -1576,6 +3724,228 @@ def test_api_auth():
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+EXPORT_CSV_COLUMNS = ["cursor", "run_id", "game_id", "collected_at", "overall_success",
+                      "duration_seconds", "authentication_method", "metrics"]
+
+def representation_etag(base_etag, fields):
+    """ETag for one ?fields= projection of a result"""
+    if not fields:
+        return base_etag
+    return f"{base_etag}-{hashlib.sha1(fields.encode('utf-8')).hexdigest()[:8]}"
+
+def matching_etag(etag):
+    """If-None-Match check that also accepts our content-coded variants - returns the tag to echo on 304
+    
+    Candidates are tried in the order the 200 response would choose its coding for this Accept-Encoding.
+    """
+    if_none_match = request.if_none_match
+    accepted = request.accept_encodings
+    codings = []
+    if brotli is not None and accepted.quality('br') > 0:
+        codings.append('br')
+    if accepted.quality('gzip') > 0:
+        codings.append('gzip')
+    candidates = [f"{etag}-{coding}" for coding in codings] + [etag] + \
+        [f"{etag}-{coding}" for coding in ('br', 'gzip') if coding not in codings]
+    for candidate in candidates:
+        if if_none_match.contains(candidate):
+            return candidate
+    return etag if if_none_match.star_tag else None
+
+def webhook_admin_required(view):
+    """Subscriber management posts our results to arbitrary URLs - keep it behind WEBHOOK_ADMIN_TOKEN"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not WEBHOOK_ADMIN_TOKEN:
+            return jsonify({"success": False, "error": "Webhooks disabled (set WEBHOOK_ADMIN_TOKEN)"}), 404
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode('utf-8'), f"Bearer {WEBHOOK_ADMIN_TOKEN}".encode('utf-8')):
+            return jsonify({"success": False, "error": "Invalid or missing admin token"}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/webhooks', methods=['GET'])
+@webhook_admin_required
+def list_webhooks():
+    """📣 Registered webhook subscribers and outbox state"""
+    return jsonify({
+        "success": True,
+        "subscribers": analytics.webhooks.list_subscribers(),
+        "outbox": analytics.webhooks.status()
+    })
+
+@app.route('/webhooks', methods=['POST'])
+@webhook_admin_required
+def register_webhook():
+    """📣 Register a URL to receive batched collection.completed events"""
+    data = request.get_json(silent=True) or {}
+    url = data.get('url')
+    url_error = analytics.webhooks.url_error(url)
+    if url_error:
+        return jsonify({"success": False, "error": url_error}), 400
+    game_ids = data.get('game_ids')
+    if game_ids is not None and not isinstance(game_ids, list):
+        return jsonify({"success": False, "error": "game_ids must be a list"}), 400
+    
+    subscriber_id = analytics.webhooks.subscribe(url, game_ids, data.get('secret'))
+    return jsonify({"success": True, "id": subscriber_id, "url": url, "game_ids": game_ids}), 201
+
+@app.route('/webhooks/<int:subscriber_id>', methods=['DELETE'])
+@webhook_admin_required
+def delete_webhook(subscriber_id):
+    """📣 Remove a subscriber and its pending deliveries"""
+    if not analytics.webhooks.unsubscribe(subscriber_id):
+        return jsonify({"success": False, "error": "Unknown webhook"}), 404
+    return jsonify({"success": True, "id": subscriber_id})
+
+@app.route('/profiles')
+def list_profiles():
+    """🔬 Stored ?profile=1 run breakdowns, oldest first"""
+    return jsonify({"success": True, "profiles": analytics.profiler.list()})
+
+@app.route('/profiles/<run_id>')
+def get_profile(run_id):
+    """🔬 Full profile summary of one run"""
+    entry = analytics.profiler.get(run_id)
+    if entry is None:
+        return jsonify({"success": False, "error": f"No stored profile for run {run_id}"}), 404
+    return fast_json_response(entry)
+
+@app.route('/analytics/<game_id>/runs')
+def recent_runs(game_id):
+    """📦 Recent compact run records retained by this worker (newest first)"""
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return jsonify({"success": False, "error": "limit must be a positive integer"}), 400
+    return jsonify({
+        "success": True,
+        "game_id": game_id,
+        "runs": [record.to_dict() for record in analytics.result_history.recent(game_id, limit)],
+        "debug_store": analytics.debug_store.status()
+    })
+
+@app.route('/analytics/runs/<run_id>/debug')
+def run_debug_details(run_id):
+    """📦 Full result of one run (steps, login details, tracebacks) while it is still retained"""
+    payload = analytics.debug_store.get(run_id)
+    if payload is None:
+        return jsonify({"success": False, "error": f"Debug details for run {run_id} are not retained on this worker"}), 404
+    return fast_json_response(payload)
+
+@app.route('/analytics/<game_id>/latest')
+def latest_analytics(game_id):
+    """📦 Latest cached result - answers If-None-Match/If-Modified-Since with 304 before touching the body"""
+    meta = analytics.cached_results_meta(game_id)
+    if not meta:
+        return jsonify({"success": False, "error": f"No collection results cached for game {game_id}"}), 404
+    
+    fields = request.args.get('fields')
+    last_modified = datetime.fromisoformat(meta["end_time"]).astimezone(timezone.utc).replace(microsecond=0)
+    etag = representation_etag(meta["etag"], fields)
+    
+    if request.if_none_match:
+        # Echo the variant the client holds, e.g. the -gzip tag its earlier 200 carried
+        matched = matching_etag(etag)
+        not_modified = matched is not None
+        etag = matched or etag
+    else:
+        not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+    if not_modified:
+        response = Response(status=304)
+    else:
+        entry = analytics.cached_results_entry(game_id)
+        if not entry:
+            return jsonify({"success": False, "error": f"No collection results cached for game {game_id}"}), 404
+        response = fast_json_response(entry["result"])
+        etag = representation_etag(entry["etag"], fields)
+        last_modified = datetime.fromisoformat(entry["result"]["end_time"]).astimezone(timezone.utc).replace(microsecond=0)
+        if response.headers.get('Content-Encoding'):
+            etag = f"{etag}-{response.headers['Content-Encoding']}"
+    
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+@app.route('/analytics/<game_id>/export')
+def export_analytics(game_id):
+    """📤 Stream collected history as NDJSON or CSV - resume with ?cursor=<last cursor seen>"""
+    try:
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in ('ndjson', 'csv'):
+            raise ValueError("format must be 'ndjson' or 'csv'")
+        cursor = int(request.args.get('cursor', 0))
+        # Row ids are SQLite INTEGERs - anything outside that range can't be a cursor we handed out
+        if not 0 <= cursor < 2 ** 63:
+            raise ValueError("cursor must be a cursor value from a previous export")
+        since = parse_time_param(request.args.get('since'))
+        until = parse_time_param(request.args.get('until'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    rows = analytics.history.iter_runs(game_id, since, until, cursor)
+    
+    if export_format == 'csv':
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_CSV_COLUMNS)
+            for row in rows:
+                row["metrics"] = json.dumps(row["metrics"])
+                writer.writerow([row[column] for column in EXPORT_CSV_COLUMNS])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        mimetype = 'text/csv'
+    else:
+        def generate():
+            for row in rows:
+                yield encode_json(row) + b'\n'
+        mimetype = 'application/x-ndjson'
+    
+    return Response(generate(), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{game_id}-history.{export_format}"'
+    })
+
+# Default look-back window per rollup resolution when ?since= is omitted
+HISTORY_DEFAULT_WINDOWS = {"hour": timedelta(days=7), "day": timedelta(days=90)}
+
+@app.route('/analytics/<game_id>/history')
+def analytics_history(game_id):
+    """📈 Hourly/daily min/max/mean/last per metric, served from incremental rollups"""
+    try:
+        resolution = request.args.get('resolution', 'hour').lower()
+        if resolution not in AnalyticsHistoryStore.ROLLUP_RESOLUTIONS:
+            raise ValueError("resolution must be 'hour' or 'day'")
+        until = parse_time_param(request.args.get('until'))
+        if until is None:
+            until = time.time()
+        since = parse_time_param(request.args.get('since'))
+        if since is None:
+            since = until - HISTORY_DEFAULT_WINDOWS[resolution].total_seconds()
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    width = AnalyticsHistoryStore.ROLLUP_RESOLUTIONS[resolution]
+    series = analytics.history.rollup_series(
+        game_id, resolution, int(since // width) * width, until, request.args.get('metric')
+    )
+    return fast_json_response({
+        "success": True,
+        "game_id": game_id,
+        "resolution": resolution,
+        "since": datetime.fromtimestamp(since).isoformat(),
+        "until": datetime.fromtimestamp(until).isoformat(),
+        "series": series
+    })
+
 @app.route('/test')
 def test_interface():
     """COMPLETE TEST INTERFACE - All tests consolidated on one page"""
@@ -1949,8 +4319,17 @@ def home():
             "POST /check-credentials-simple - Simple credential validation",
             "POST /test-credentials - Credential validation testing",
             "POST /login-test - Test complete login process",
-            "POST /trigger-diagnostic - Complete analytics collection",
-            "POST /test-api-auth - Test API authentication"
+            "POST /trigger-diagnostic - Complete analytics collection (?profile=1 attaches a profile)",
+            "GET /profiles, GET /profiles/<run_id> - Stored run profiles",
+            "GET /metrics - Prometheus counters (WebDriver session reuse and command counts)",
+            "POST /test-api-auth - Test API authentication",
+            "GET/POST /webhooks, DELETE /webhooks/<id> - Push notifications of new results (admin token)",
+            "GET /readyz - Readiness (waits for warm-up)",
+            "GET /analytics/<game_id>/runs - Recent compact run records",
+            "GET /analytics/runs/<run_id>/debug - Full details of a retained run",
+            "GET /analytics/<game_id>/latest - Latest cached result (ETag / If-None-Match aware)",
+            "GET /analytics/<game_id>/export - Stream collected history (format=ndjson|csv, since, until, cursor)",
+            "GET /analytics/<game_id>/history - Hourly/daily metric rollups (resolution=hour|day, since, until, metric)"
         ],
         "current_diagnosis": {
             "automation_status": "✅ Working perfectly",
@@ -1965,6 +4344,86 @@ def home():
         }
     })
 
+def memory_profiling_required(view):
+    """Hide /debug/memory unless MEMORY_PROFILING_ENABLED is set"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if memory_profiler is None:
+            return jsonify({"success": False, "error": "Memory profiling disabled (set MEMORY_PROFILING_ENABLED=1)"}), 404
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/debug/memory')
+@memory_profiling_required
+def memory_status():
+    """🧠 tracemalloc state, stored snapshots and RSS over time"""
+    return jsonify({"success": True, **memory_profiler.status()})
+
+@app.route('/debug/memory/start', methods=['POST'])
+@memory_profiling_required
+def memory_start():
+    """🧠 Start tracemalloc (?frames=N for deeper tracebacks, at extra overhead)"""
+    try:
+        # tracemalloc itself rejects frame counts outside 1..65535 with ValueError
+        memory_profiler.start(frames=int(request.args.get('frames', 1)))
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"frames must be an integer from 1 to 65535 ({e})"}), 400
+    return jsonify({"success": True, **memory_profiler.status()})
+
+@app.route('/debug/memory/stop', methods=['POST'])
+@memory_profiling_required
+def memory_stop():
+    """🧠 Stop tracemalloc and drop stored snapshots"""
+    memory_profiler.stop()
+    return jsonify({"success": True, "tracing": False})
+
+@app.route('/debug/memory/snapshot', methods=['POST'])
+@memory_profiling_required
+def memory_snapshot():
+    """🧠 Take a named snapshot (?name=, defaults to a timestamp)"""
+    name = request.args.get('name') or datetime.now().strftime('%Y%m%dT%H%M%S')
+    try:
+        return jsonify({"success": True, **memory_profiler.take_snapshot(name)})
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+
+@app.route('/debug/memory/diff')
+@memory_profiling_required
+def memory_diff():
+    """🧠 Top-N allocation growth by file or line between ?from= and ?to= (default: now)"""
+    key_type = request.args.get('key_type', 'lineno')
+    if key_type not in ('lineno', 'filename'):
+        return jsonify({"success": False, "error": "key_type must be 'lineno' or 'filename'"}), 400
+    from_name = request.args.get('from')
+    if not from_name:
+        return jsonify({"success": False, "error": "from snapshot name is required"}), 400
+    try:
+        limit = int(request.args.get('limit', 20))
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({"success": False, "error": "limit must be a positive integer"}), 400
+    try:
+        top = memory_profiler.diff(from_name, request.args.get('to'), key_type, limit)
+    except KeyError as e:
+        return jsonify({"success": False, "error": str(e.args[0])}), 404
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return jsonify({"success": True, "from": from_name, "to": request.args.get('to') or "now",
+                    "key_type": key_type, "top": top})
+
+@app.route('/readyz')
+def readyz():
+    """🔥 Readiness: 503 until warm-up has finished, and again while draining for shutdown"""
+    warm = warmup is None or warmup.ready.is_set()
+    ready = warm and not admission.draining
+    return jsonify({
+        "ready": ready,
+        "draining": admission.draining,
+        "warmup": warmup.status() if warmup else {"enabled": False},
+        "timestamp": datetime.now().isoformat()
+    }), 200 if ready else 503
+
 @app.route('/health')
 def health():
     """Enhanced health check with complete system information"""
@@ -1992,4 +4451,6 @@ if __name__ == '__main__':
     logger.info(f"🌐 Selenium URL: {analytics.selenium_url}")
     logger.info(f"✅ All critical fixes and enhancements included")
     logger.info(f"🎯 Main test interface available at: /test")
+    start_background_services()
+    shutdown.install()
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# main.py opens its SQLite file and state backend at import - keep both away from the working tree
+os.environ.setdefault("ANALYTICS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="analytics-tests-"), "analytics.db"))
+os.environ.pop("STATE_BACKEND_URL", None)
+os.environ.pop("WEBDRIVER_RECORD_PATH", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _stop_main_logging():
+    # main.py's log listener writes to the stdout it saw at import (pytest's capture file, closed
+    # before atexit) - stop it while that stream is still open so exit-time records aren't written to it
+    yield
+    if "main" in sys.modules:
+        sys.modules["main"]._stop_log_listener()
@@ -0,0 +1,98 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from werkzeug.http import http_date
+
+import main
+
+END_TIME = datetime(2026, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def game_id():
+    game_id = f"etag-{uuid.uuid4().hex[:8]}"
+    main.analytics.cache_game_results(result(game_id))
+    return game_id
+
+
+def result(game_id, qptr=12.4):
+    # Large enough to be compressed, so the content-coded ETags come into play
+    return {"game_id": game_id, "run_id": "r1", "end_time": END_TIME.isoformat(), "overall_success": True,
+            "metrics": {"qptr": qptr, "percentage": 38.5},
+            "notes": [f"step {i} finished without retries" for i in range(100)]}
+
+
+def get(game_id, query="", **headers):
+    return main.app.test_client().get(f"/analytics/{game_id}/latest{query}", headers=headers)
+
+
+def etag_of(response):
+    return response.get_etag()[0]
+
+
+def test_plain_etag_revalidates(game_id):
+    first = get(game_id, **{"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert "Content-Encoding" not in first.headers
+
+    again = get(game_id, **{"Accept-Encoding": "identity", "If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert etag_of(again) == etag_of(first)
+
+
+@pytest.mark.parametrize("coding", ["gzip", "br"])
+def test_content_coded_etag_is_echoed_on_304(game_id, coding):
+    if coding == "br" and main.brotli is None:
+        pytest.skip("brotli not installed")
+    first = get(game_id, **{"Accept-Encoding": coding})
+    assert first.headers["Content-Encoding"] == coding
+    assert etag_of(first).endswith(f"-{coding}")
+
+    again = get(game_id, **{"Accept-Encoding": "br, gzip", "If-None-Match": first.headers["ETag"]})
+
+    assert again.status_code == 304
+    assert etag_of(again) == etag_of(first)
+
+
+def test_star_and_stale_tags(game_id):
+    assert get(game_id, **{"If-None-Match": "*"}).status_code == 304
+    assert get(game_id, **{"If-None-Match": '"not-the-current-tag"'}).status_code == 200
+
+
+def test_changed_result_invalidates_old_etag(game_id):
+    old = etag_of(get(game_id, **{"Accept-Encoding": "identity"}))
+    main.analytics.cache_game_results(result(game_id, qptr=13.0))
+
+    response = get(game_id, **{"Accept-Encoding": "identity", "If-None-Match": f'"{old}"'})
+
+    assert response.status_code == 200
+    assert etag_of(response) != old
+
+
+def test_if_modified_since(game_id):
+    last_modified = END_TIME.astimezone(timezone.utc)
+
+    assert get(game_id, **{"If-Modified-Since": http_date(last_modified)}).status_code == 304
+    assert get(game_id, **{"If-Modified-Since": http_date(last_modified + timedelta(hours=1))}).status_code == 304
+    assert get(game_id, **{"If-Modified-Since": http_date(last_modified - timedelta(seconds=1))}).status_code == 200
+    # If-None-Match wins when both are sent
+    assert get(game_id, **{"If-Modified-Since": http_date(last_modified),
+                           "If-None-Match": '"not-the-current-tag"'}).status_code == 200
+
+
+def test_fields_projection_has_its_own_etag(game_id):
+    full = get(game_id, **{"Accept-Encoding": "identity"})
+    projected = get(game_id, "?fields=metrics.qptr", **{"Accept-Encoding": "identity"})
+
+    assert projected.get_json() == {"metrics": {"qptr": 12.4}}
+    assert etag_of(projected) != etag_of(full)
+    assert get(game_id, "?fields=metrics.qptr", **{"If-None-Match": full.headers["ETag"]}).status_code == 200
+    assert get(game_id, "?fields=metrics.qptr", **{"If-None-Match": projected.headers["ETag"]}).status_code == 304
+    assert get(game_id, "?fields=metrics", **{"If-None-Match": projected.headers["ETag"]}).status_code == 200
+
+
+def test_unknown_game_is_404():
+    assert get(f"etag-{uuid.uuid4().hex[:8]}").status_code == 404
@@ -0,0 +1,100 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import main
+
+DAY = 1767225600  # 2026-01-01 00:00 UTC, a day (and hour) boundary
+
+
+def run_at(epoch, qptr, game_id="1"):
+    return {
+        "game_id": game_id,
+        "end_time": datetime.fromtimestamp(epoch).isoformat(),
+        "overall_success": True,
+        "steps": {"qptr_extraction": {"metrics": {"qptr": qptr}}},
+    }
+
+
+# Recorded out of order: neither the first nor the last write is the newest run in its bucket
+RUNS = [
+    (DAY + 86400 + 1800, 2.0),   # next day 00:30
+    (DAY + 11 * 3600 + 300, 9.0),  # 11:05
+    (DAY + 10 * 3600 + 3000, 7.0),  # 10:50
+    (DAY + 10 * 3600 + 600, 3.0),  # 10:10
+    (DAY + 10 * 3600 + 1800, 5.0),  # 10:30
+]
+
+
+def bucket(epoch, count, low, high, mean, last):
+    return {"bucket_start": datetime.fromtimestamp(epoch).isoformat(), "count": count,
+            "min": low, "max": high, "mean": mean, "last": last}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return main.AnalyticsHistoryStore(str(tmp_path / "history.db"))
+
+
+def series(store, resolution):
+    return store.rollup_series("1", resolution, DAY, DAY + 2 * 86400)["qptr"]
+
+
+def test_rollups_fold_out_of_order_runs(store):
+    for epoch, qptr in RUNS:
+        store.record_run(run_at(epoch, qptr))
+
+    assert series(store, "hour") == [
+        bucket(DAY + 10 * 3600, 3, 3.0, 7.0, 5.0, 7.0),
+        bucket(DAY + 11 * 3600, 1, 9.0, 9.0, 9.0, 9.0),
+        bucket(DAY + 86400, 1, 2.0, 2.0, 2.0, 2.0),
+    ]
+    assert series(store, "day") == [
+        bucket(DAY, 4, 3.0, 9.0, 6.0, 9.0),
+        bucket(DAY + 86400, 1, 2.0, 2.0, 2.0, 2.0),
+    ]
+
+
+def test_backfill_rebuilds_missing_rollups_once(store, monkeypatch):
+    for epoch, qptr in RUNS:
+        store.record_run(run_at(epoch, qptr))
+    expected = {resolution: series(store, resolution) for resolution in ("hour", "day")}
+    with sqlite3.connect(store.db_path) as conn:
+        conn.execute("DELETE FROM metric_rollups")
+        conn.execute("DELETE FROM history_meta")
+    monkeypatch.setattr(main.AnalyticsHistoryStore, "EXPORT_BATCH_SIZE", 2)
+
+    # Rebuilt across several batches, then the marker keeps later opens from counting runs again
+    for _ in range(2):
+        reopened = main.AnalyticsHistoryStore(store.db_path)
+        assert {resolution: series(reopened, resolution) for resolution in ("hour", "day")} == expected
+
+
+def test_backfill_only_marks_files_that_already_have_rollups(store):
+    for epoch, qptr in RUNS:
+        store.record_run(run_at(epoch, qptr))
+    expected = series(store, "day")
+    with sqlite3.connect(store.db_path) as conn:
+        conn.execute("DELETE FROM history_meta")
+
+    reopened = main.AnalyticsHistoryStore(store.db_path)
+
+    assert series(reopened, "day") == expected
+    with sqlite3.connect(store.db_path) as conn:
+        assert conn.execute("SELECT 1 FROM history_meta WHERE key = 'rollups_backfilled'").fetchone()
+
+
+@pytest.mark.parametrize("query", ["since=1e20", "until=1e20", "since=inf", "until=nan", "since=-5", "since=soon"])
+def test_history_rejects_unusable_time_params(query):
+    response = main.app.test_client().get(f"/analytics/1/history?{query}")
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+@pytest.mark.parametrize("cursor", ["100000000000000000000000", "-1", "next"])
+def test_export_rejects_unusable_cursor(cursor):
+    response = main.app.test_client().get(f"/analytics/1/export?cursor={cursor}")
+
+    assert response.status_code == 400
@@ -0,0 +1,152 @@
+import base64
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import jsonify
+
+import main
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def diagnostic_payload(seed=7):
+    """Shaped like a /debug-enhanced or complete-collection result: nested steps, page analysis, logs, screenshots"""
+    rng = random.Random(seed)
+    started = datetime(2026, 1, 5, 12, 0, 0)
+    return {
+        "game_id": "7291257156",
+        "overall_success": True,
+        "start_time": started.isoformat(),
+        "region_detection": {"country": "US", "region": "California", "is_eu": False,
+                             "ip_info": {"ip": "203.0.113.7", "org": "AS64500 Example Cloud", "timezone": "America/Los_Angeles"}},
+        "steps": {
+            "authentication": {"success": True, "method": "ui_login", "attempts": 1,
+                               "screenshots": [base64.b64encode(rng.randbytes(24_000)).decode() for _ in range(2)]},
+            "qptr_extraction": {"success": True,
+                                "extracted_values": {"qptr": 12.4, "percentage": 38.5, "quality": 7.2},
+                                "candidates": [{"selector": f"div.metric-card:nth-child({i}) span.value",
+                                                "text": f"{rng.uniform(0, 100):.1f}%", "visible": i % 3 != 0}
+                                               for i in range(120)]},
+        },
+        "analysis": {
+            "cookie_elements": [{"tag": "div", "id": f"cookie-banner-{i}", "class": "cookie-consent modal fade",
+                                 "text": "We use cookies to improve your experience on Roblox", "visible": False}
+                                for i in range(40)],
+            "gdpr_indicators": ["cookie", "privacy"],
+        },
+        "log": [{"at": started + timedelta(milliseconds=250 * i), "level": "INFO",
+                 "message": f"Step {i % 7}: waiting for element #{rng.choice(['login-username', 'login-password', 'login-button'])}"}
+                for i in range(400)],
+        "end_time": datetime(2026, 1, 5, 12, 1, 42),
+    }
+
+
+def best_of(repeats, call):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def bench(payload=None, repeats=30):
+    """Encode time and body bytes: jsonify vs fast_json_response (identity, gzip, br)"""
+    payload = payload or diagnostic_payload()
+    report = {}
+    with main.app.test_request_context('/'):
+        body = jsonify(payload).get_data()
+        report["jsonify"] = {"seconds": best_of(repeats, lambda: jsonify(payload).get_data()), "bytes": len(body)}
+    for encoding in ("identity", "gzip", "br"):
+        if encoding == "br" and brotli is None:
+            continue
+        with main.app.test_request_context('/', headers={"Accept-Encoding": encoding}):
+            body = main.fast_json_response(payload).get_data()
+            seconds = best_of(repeats, lambda: main.fast_json_response(payload).get_data())
+            report[f"fast_json_response[{encoding}]"] = {"seconds": seconds, "bytes": len(body)}
+    return report
+
+
+def decoded(response):
+    body = response.get_data()
+    encoding = response.headers.get("Content-Encoding")
+    if encoding == "gzip":
+        body = gzip.decompress(body)
+    elif encoding == "br":
+        body = brotli.decompress(body)
+    return json.loads(body)
+
+
+def test_fast_json_response_is_cheaper_than_jsonify():
+    """Bench - run with -s to see the numbers"""
+    report = bench()
+    for variant, stats in report.items():
+        print(f"{variant:32} {stats['seconds'] * 1000:8.2f} ms {stats['bytes']:>10,} bytes")
+
+    jsonify_stats = report["jsonify"]
+    identity = report["fast_json_response[identity]"]
+    assert identity["bytes"] < jsonify_stats["bytes"]
+    assert report["fast_json_response[gzip]"]["bytes"] < jsonify_stats["bytes"] * 0.6
+    if main.orjson is not None:
+        assert identity["seconds"] < jsonify_stats["seconds"]
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0.5, br", "br"),
+    ("identity", None),
+    ("", None),
+])
+def test_encoding_negotiation_round_trips(accept, expected):
+    if expected == "br" and brotli is None:
+        pytest.skip("brotli not installed")
+    payload = diagnostic_payload()
+    with main.app.test_request_context('/', headers={"Accept-Encoding": accept}):
+        response = main.fast_json_response(payload)
+
+    assert response.headers.get("Content-Encoding") == expected
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert decoded(response) == json.loads(main.encode_json(payload))
+
+
+def test_small_bodies_are_not_compressed():
+    with main.app.test_request_context('/', headers={"Accept-Encoding": "gzip, br"}):
+        response = main.fast_json_response({"success": True})
+
+    assert "Content-Encoding" not in response.headers
+    assert json.loads(response.get_data()) == {"success": True}
+
+
+def test_encode_json_handles_datetimes_and_non_str_keys():
+    encoded = json.loads(main.encode_json({"at": datetime(2026, 1, 5, 12, 0), 7: "seven"}))
+
+    assert encoded["7"] == "seven"
+    assert encoded["at"].startswith("2026-01-05")
+
+
+@pytest.mark.parametrize("fields, expected", [
+    (["overall_success"], {"overall_success": True}),
+    (["steps.qptr_extraction.extracted_values"],
+     {"steps": {"qptr_extraction": {"extracted_values": {"qptr": 12.4, "percentage": 38.5, "quality": 7.2}}}}),
+    (["steps.authentication.method", "steps.qptr_extraction.extracted_values.qptr"],
+     {"steps": {"authentication": {"method": "ui_login"}, "qptr_extraction": {"extracted_values": {"qptr": 12.4}}}}),
+    (["steps.missing", "nope", "overall_success.deeper"], {}),
+    (["", ".", "game_id."], {"game_id": "7291257156"}),
+])
+def test_project_fields(fields, expected):
+    assert main.project_fields(diagnostic_payload(), fields) == expected
+
+
+def test_fields_query_projects_the_response():
+    with main.app.test_request_context('/?fields=game_id,steps.qptr_extraction.extracted_values.qptr'):
+        response = main.fast_json_response(diagnostic_payload())
+
+    assert decoded(response) == {"game_id": "7291257156", "steps": {"qptr_extraction": {"extracted_values": {"qptr": 12.4}}}}
+
@@ -0,0 +1,22 @@
+import tracemalloc
+
+import main
+
+
+def test_diff_against_now_excludes_tracemalloc_allocations():
+    profiler = main.MemoryProfiler(snapshot_limit=3)
+    profiler.start()
+    try:
+        profiler.take_snapshot("a")
+        profiler.take_snapshot("b")
+        growth = [bytearray(4096) for _ in range(64)]
+
+        top = profiler.diff("a", limit=5)
+    finally:
+        profiler.stop()
+
+    assert top
+    assert not any(tracemalloc.__file__ in entry["location"] for entry in top)
+    assert any(__file__ in entry["location"] for entry in top)
+    del growth
+
@@ -0,0 +1,36 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def game_id():
+    game_id = f"runs-{uuid.uuid4().hex[:8]}"
+    for minutes_ago in (10, 5):
+        main.analytics.result_history.add(main.ResultRecord.from_results({
+            "run_id": f"{game_id}-{minutes_ago}",
+            "game_id": game_id,
+            "end_time": (datetime.now() - timedelta(minutes=minutes_ago)).isoformat(),
+            "overall_success": True,
+        }))
+    return game_id
+
+
+def runs(game_id, query=""):
+    return main.app.test_client().get(f"/analytics/{game_id}/runs{query}")
+
+
+def test_recent_runs_newest_first(game_id):
+    assert [run["run_id"] for run in runs(game_id).get_json()["runs"]] == [f"{game_id}-5", f"{game_id}-10"]
+    assert [run["run_id"] for run in runs(game_id, "?limit=1").get_json()["runs"]] == [f"{game_id}-5"]
+
+
+@pytest.mark.parametrize("limit", ["-1", "0", "many"])
+def test_recent_runs_rejects_non_positive_limit(game_id, limit):
+    response = runs(game_id, f"?limit={limit}")
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
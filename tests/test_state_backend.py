@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+import main
+
+
+def make_backend(kind):
+    if kind == "memory":
+        return main.InMemoryStateBackend()
+    fakeredis = pytest.importorskip("fakeredis")
+    # The injected-client path: the same backend code against a local stand-in for Redis
+    client = fakeredis.FakeRedis(decode_responses=(kind == "redis-str"))
+    return main.RedisStateBackend(namespace="test", client=client)
+
+
+@pytest.fixture(params=["memory", "redis-bytes", "redis-str"])
+def backend(request):
+    backend = make_backend(request.param)
+    yield backend
+    backend.close()
+
+
+def test_interface_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        main.StateBackend()
+
+
+def test_values_round_trip_as_json(backend):
+    value = {"game_id": "1", "metrics": {"qptr": 1.5}, "steps": [1, None, True]}
+    backend.set("results:game:1", value)
+    assert backend.get("results:game:1") == value
+    assert backend.get("missing") is None
+
+    backend.delete("results:game:1")
+    assert backend.get("results:game:1") is None
+
+
+def test_values_expire(backend):
+    backend.set("region_info", {"country": "US"}, ttl=1)
+    assert backend.get("region_info") == {"country": "US"}
+    time.sleep(1.1)
+    assert backend.get("region_info") is None
+
+
+def test_lock_has_a_single_owner(backend):
+    token = backend.acquire_lock("lock:collection:1", ttl=30)
+    assert token is not None
+    assert backend.is_locked("lock:collection:1")
+    assert backend.acquire_lock("lock:collection:1", ttl=30) is None
+
+    # Only the owner may extend or release it
+    assert backend.extend_lock("lock:collection:1", "not-the-owner", ttl=30) is False
+    backend.release_lock("lock:collection:1", "not-the-owner")
+    assert backend.is_locked("lock:collection:1")
+
+    assert backend.extend_lock("lock:collection:1", token, ttl=30) is True
+    backend.release_lock("lock:collection:1", token)
+    assert not backend.is_locked("lock:collection:1")
+    assert backend.acquire_lock("lock:collection:1", ttl=30) is not None
+
+
+def test_expired_lock_can_be_taken_over(backend):
+    stale = backend.acquire_lock("lock:collection:1", ttl=0.2)
+    time.sleep(0.3)
+    fresh = backend.acquire_lock("lock:collection:1", ttl=30)
+    assert fresh is not None
+
+    # The previous owner's late release must not free the new owner's lock
+    backend.release_lock("lock:collection:1", stale)
+    assert backend.is_locked("lock:collection:1")
+    assert backend.extend_lock("lock:collection:1", stale, ttl=30) is False
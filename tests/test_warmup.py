@@ -0,0 +1,76 @@
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+
+import main
+
+
+def finished_run(game_id, end_time, **overrides):
+    results = {
+        "run_id": uuid.uuid4().hex[:12],
+        "game_id": game_id,
+        "end_time": end_time.isoformat(),
+        "duration_seconds": 84.2,
+        "overall_success": True,
+        "aborted": False,
+        "authentication_method": "ui_authentication",
+        "steps": {"qptr_extraction": {"metrics": {"qptr": 12.4, "percentage": 38, "quality": 7.2}}},
+    }
+    results.update(overrides)
+    return results
+
+
+def no_collection(*args, **kwargs):
+    raise AssertionError("warm-up must not open a browser when history has the run")
+
+
+def test_prime_results_restores_newest_run_from_history(monkeypatch):
+    game_id = f"warm-{uuid.uuid4().hex[:8]}"
+    now = datetime.now()
+    main.analytics.history.record_run(finished_run(game_id, now - timedelta(minutes=30)))
+    newest = finished_run(game_id, now - timedelta(minutes=5), aborted=True, overall_success=False)
+    main.analytics.history.record_run(newest)
+    monkeypatch.setattr(main.analytics, "collect_with_dedup", no_collection)
+
+    assert main.WarmupRunner(main.analytics, [game_id])._prime_results(game_id) == "restored from history"
+
+    # Byte-for-byte what the collecting worker cached - so the ETag matches too
+    entry = main.analytics.cached_results_entry(game_id)
+    expected = main.ResultRecord.from_results(newest).to_dict()
+    assert entry["result"] == expected
+    main.analytics.cache_game_results(expected)
+    assert main.analytics.cached_results_entry(game_id)["etag"] == entry["etag"]
+
+
+def test_prime_results_collects_without_usable_history(monkeypatch):
+    collected = []
+    monkeypatch.setattr(main.analytics, "collect_with_dedup",
+                        lambda game_id, *args, **kwargs: collected.append(game_id) or {"overall_success": True})
+    never_ran = f"warm-{uuid.uuid4().hex[:8]}"
+    expired = f"warm-{uuid.uuid4().hex[:8]}"
+    main.analytics.history.record_run(
+        finished_run(expired, datetime.now() - timedelta(seconds=main.RESULT_CACHE_TTL_SECONDS + 60)))
+    runner = main.WarmupRunner(main.analytics, [never_ran, expired])
+
+    assert runner._prime_results(never_ran) == "collected"
+    assert runner._prime_results(expired) == "collected"
+    assert collected == [never_ran, expired]
+
+
+def test_history_file_without_aborted_column_is_migrated(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE collection_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT, game_id TEXT NOT NULL,
+                collected_at REAL NOT NULL, overall_success INTEGER NOT NULL, duration_seconds REAL,
+                authentication_method TEXT, metrics TEXT NOT NULL DEFAULT '{}')
+        """)
+        conn.execute("INSERT INTO collection_runs (run_id, game_id, collected_at, overall_success, metrics) "
+                     "VALUES ('old', '1', 1700000000, 1, '{}')")
+
+    store = main.AnalyticsHistoryStore(db_path)
+
+    assert store.latest_run("1")["aborted"] is False
+    store.record_run(finished_run("1", datetime.now(), aborted=True))
+    assert store.latest_run("1")["aborted"] is True
@@ -0,0 +1,74 @@
+import os
+import time
+
+import pytest
+
+import main
+import webdriver_replay
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+REGION = {"country": "US", "region": "California", "is_eu": False, "will_trigger_gdpr": False, "ip_info": {}}
+
+
+class _NoSleep:
+    """time module stand-in - the recorded flow waits for page loads the replay doesn't need"""
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    @staticmethod
+    def sleep(seconds):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fast_replay(monkeypatch):
+    monkeypatch.setattr(main, "time", _NoSleep())
+    monkeypatch.setattr(main.analytics, "detect_server_region", lambda **kwargs: REGION)
+
+
+def test_collection_bench_matches_recorded_commands():
+    report = webdriver_replay.run_bench(os.path.join(FIXTURES, "collection.jsonl"), "collection")
+
+    assert report["overall_success"] is True
+    commands = report["webdriver_commands"]
+    assert commands["total"] == 29
+    assert commands["per_step"]["login"] == 20
+    assert commands["per_step"]["qptr_extraction"] == 4
+    assert commands["budget_exceeded"] is False
+    assert report["replay"]["unmatched"] == []
+
+
+def test_qptr_bench_matches_recorded_commands():
+    report = webdriver_replay.run_bench(os.path.join(FIXTURES, "qptr_extraction.jsonl"), "qptr")
+
+    assert report["overall_success"] is True
+    assert report["webdriver_commands"]["per_step"] == {"qptr_extraction": 4}
+    assert report["webdriver_commands"]["budget_exceeded"] is False
+    assert report["replay"]["unmatched"] == []
+
+
+def test_bench_flags_exceeded_budget():
+    report = webdriver_replay.run_bench(os.path.join(FIXTURES, "qptr_extraction.jsonl"), "qptr",
+                                        budgets={"qptr_extraction": 3})
+
+    assert report["webdriver_commands"]["budget_exceeded"] is True
+    assert "qptr_extraction" in report["webdriver_commands"]["over_budget"]
+
+
+def test_bench_cli_exits_nonzero_over_budget(capsys):
+    recording = os.path.join(FIXTURES, "qptr_extraction.jsonl")
+
+    assert webdriver_replay.main(["bench", recording, "--path", "qptr"]) == 0
+    assert webdriver_replay.main(["bench", recording, "--path", "qptr", "--budgets", '{"total": 3}']) == 1
+
+
+def test_malformed_budget_env_falls_back_to_defaults(monkeypatch):
+    defaults = {"login": 40, "total": 60}
+
+    monkeypatch.setenv("WEBDRIVER_COMMAND_BUDGETS", "{not json")
+    assert main._load_command_budgets(defaults) == defaults
+    monkeypatch.setenv("WEBDRIVER_COMMAND_BUDGETS", '{"login": "many"}')
+    assert main._load_command_budgets(defaults) == defaults
+    monkeypatch.setenv("WEBDRIVER_COMMAND_BUDGETS", '{"login": 25}')
+    assert main._load_command_budgets(defaults) == {"login": 25, "total": 60}
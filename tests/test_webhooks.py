@@ -0,0 +1,141 @@
+import hashlib
+import hmac
+import json
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import main
+
+
+class Sink:
+    """Local HTTP receiver: answers with the queued status codes (200 once they run out)"""
+
+    def __init__(self):
+        self.requests = []
+        self.statuses = []
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                sink.requests.append({"headers": dict(self.headers), "body": body})
+                self.send_response(sink.statuses.pop(0) if sink.statuses else 200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+
+    def events(self, index=-1):
+        return json.loads(self.requests[index]["body"])["events"]
+
+
+@pytest.fixture
+def sink():
+    sink = Sink()
+    yield sink
+    sink.server.shutdown()
+    sink.server.server_close()
+
+
+@pytest.fixture
+def dispatcher(tmp_path):
+    dispatcher = main.WebhookDispatcher(str(tmp_path / "webhooks.db"), allow_private_hosts=True)
+    yield dispatcher
+    dispatcher.http.close()
+
+
+def outbox(dispatcher):
+    with sqlite3.connect(dispatcher.db_path) as conn:
+        return conn.execute("SELECT game_id, attempts, dead FROM webhook_outbox ORDER BY id").fetchall()
+
+
+def make_due(dispatcher):
+    with sqlite3.connect(dispatcher.db_path) as conn:
+        conn.execute("UPDATE webhook_outbox SET next_attempt_at = 0")
+
+
+def result(game_id, run_id):
+    return {"game_id": game_id, "run_id": run_id, "overall_success": True,
+            "steps": {"qptr_extraction": {"metrics": {"qptr": 1.5}}}}
+
+
+def test_batch_is_coalesced_per_game_and_signed(dispatcher, sink):
+    dispatcher.subscribe(sink.url, secret="s3cret")
+    dispatcher.enqueue(result("1", "run-a"))
+    dispatcher.enqueue(result("1", "run-b"))
+    dispatcher.enqueue(result("2", "run-c"))
+
+    dispatcher.deliver_due()
+
+    assert len(sink.requests) == 1
+    assert sorted(event["run_id"] for event in sink.events()) == ["run-b", "run-c"]
+    body = sink.requests[0]["body"]
+    expected = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    assert sink.requests[0]["headers"]["X-Webhook-Signature"] == expected
+    assert outbox(dispatcher) == []
+
+
+def test_game_filter_limits_subscribers(dispatcher, sink):
+    dispatcher.subscribe(sink.url, game_ids=["2"])
+    dispatcher.enqueue(result("1", "run-a"))
+    assert outbox(dispatcher) == []
+
+
+def test_failed_delivery_is_retried(dispatcher, sink):
+    dispatcher.subscribe(sink.url)
+    dispatcher.enqueue(result("1", "run-a"))
+    sink.statuses = [500]
+
+    dispatcher.deliver_due()
+    assert outbox(dispatcher) == [("1", 1, 0)]
+
+    # Backed off: nothing is due until the retry time passes
+    dispatcher.deliver_due()
+    assert len(sink.requests) == 1
+
+    make_due(dispatcher)
+    dispatcher.deliver_due()
+    assert len(sink.requests) == 2
+    assert outbox(dispatcher) == []
+
+
+def test_attempts_are_counted_per_row(dispatcher, sink, monkeypatch):
+    monkeypatch.setattr(main, "WEBHOOK_MAX_ATTEMPTS", 3)
+    dispatcher.subscribe(sink.url)
+    sink.statuses = [500] * 3
+
+    dispatcher.enqueue(result("1", "run-a"))
+    dispatcher.deliver_due()
+    make_due(dispatcher)
+    dispatcher.deliver_due()
+    make_due(dispatcher)
+    dispatcher.enqueue(result("2", "run-b"))
+    dispatcher.deliver_due()
+
+    # The old row is out of attempts; the new one has failed once and stays pending
+    assert outbox(dispatcher) == [("1", 3, 1), ("2", 1, 0)]
+
+
+def test_private_targets_are_refused(tmp_path, sink):
+    dispatcher = main.WebhookDispatcher(str(tmp_path / "webhooks.db"))
+    try:
+        assert dispatcher.url_error(sink.url) is not None
+        assert dispatcher.url_error("http://169.254.169.254/latest/meta-data") is not None
+        assert dispatcher.url_error("ftp://example.com/") is not None
+
+        # A subscriber that already points at a private host is never posted to
+        dispatcher.subscribe(sink.url)
+        dispatcher.enqueue(result("1", "run-a"))
+        dispatcher.deliver_due()
+        assert sink.requests == []
+        assert outbox(dispatcher) == [("1", 1, 0)]
+    finally:
+        dispatcher.http.close()
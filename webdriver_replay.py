@@ -0,0 +1,410 @@
+"""🎞️ Record and replay W3C WebDriver traffic against the remote hub.
+
+Record: set WEBDRIVER_RECORD_PATH=recording.jsonl and run a collection - every command
+main.py sends to the hub is appended as one JSON line.
+
+Replay: python webdriver_replay.py serve recording.jsonl --port 4444 [--latency zero]
+then point SELENIUM_URL at http://127.0.0.1:4444 - no browser and no network needed.
+
+Summary: python webdriver_replay.py summary recording.jsonl
+
+Bench: python webdriver_replay.py bench recording.jsonl [--path qptr] [--budgets '{"total": 80}']
+replays a recording through main.py's own code path and exits 1 if a command budget is exceeded.
+"""
+
+import argparse
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "***"
+
+# W3C element / shadow root reference keys - replay needs these ids intact
+WEB_ELEMENT_KEYS = ("element-6066-11e4-a52e-4f735466cecf", "shadow-6066-11e4-a52e-4f735466cecf")
+
+def _redact_strings(value):
+    """Blank every string in a script result, keeping its shape, numbers, booleans and element references"""
+    if isinstance(value, str):
+        return REDACTED
+    if isinstance(value, list):
+        return [_redact_strings(item) for item in value]
+    if isinstance(value, dict):
+        if len(value) == 1 and next(iter(value)) in WEB_ELEMENT_KEYS:
+            return value
+        return {key: _redact_strings(item) for key, item in value.items()}
+    return value
+
+def _redact(path, body, response):
+    """Typed text, script results (e.g. a password field's value) and cookie values stay out of fixtures"""
+    if isinstance(body, dict) and path.endswith("/value") and "/element/" in path:
+        body = dict(body)
+        if "text" in body:
+            body["text"] = REDACTED
+        if "value" in body:
+            body["value"] = [REDACTED]
+    if "/cookie" in path and isinstance(response, dict):
+        value = response.get("value")
+        if isinstance(value, list):
+            value = [dict(cookie, value=REDACTED) if isinstance(cookie, dict) else cookie for cookie in value]
+        elif isinstance(value, dict) and "value" in value:
+            value = dict(value, value=REDACTED)
+        response = dict(response, value=value)
+    # Script results and direct reads of an input's value can carry what was typed into it
+    reads_values = "/execute/" in path or path.endswith(("/attribute/value", "/property/value"))
+    if reads_values and isinstance(response, dict) and response.get("status", 200) < 400:
+        response = dict(response, value=_redact_strings(response.get("value")))
+    return body, response
+
+# Stats of the collection run the current thread is working for (None outside a run)
+current_command_stats = contextvars.ContextVar('current_command_stats', default=None)
+
+class CommandStats:
+    """🔢 Count and hub time of WebDriver commands, per command name and per pipeline step"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands = defaultdict(lambda: [0, 0.0])
+        self.steps = defaultdict(int)
+
+    def add(self, command, seconds):
+        with self._lock:
+            entry = self.commands[command]
+            entry[0] += 1
+            entry[1] += seconds
+
+    def add_step(self, step, count):
+        with self._lock:
+            self.steps[step] += count
+
+    @property
+    def total(self):
+        with self._lock:
+            return sum(count for count, _ in self.commands.values())
+
+    def to_dict(self, budgets=None):
+        """Totals plus budget check - budget keys are step names, "total" covers the whole run"""
+        with self._lock:
+            commands = {name: {"count": count, "seconds": round(seconds, 3)}
+                        for name, (count, seconds) in sorted(self.commands.items(), key=lambda item: -item[1][0])}
+            steps = dict(self.steps)
+        total = sum(entry["count"] for entry in commands.values())
+        over_budget = check_budgets(total, steps, budgets)
+        return {
+            "total": total,
+            "seconds": round(sum(entry["seconds"] for entry in commands.values()), 3),
+            "per_step": steps,
+            "per_command": commands,
+            "budgets": budgets or {},
+            "budget_exceeded": bool(over_budget),
+            "over_budget": over_budget
+        }
+
+def check_budgets(total, steps, budgets):
+    """{scope: {"commands", "budget"}} for every budget exceeded - "total" is the whole run, other keys are steps"""
+    over_budget = {}
+    for scope, budget in (budgets or {}).items():
+        count = total if scope == "total" else steps.get(scope)
+        if count is not None and count > budget:
+            over_budget[scope] = {"commands": count, "budget": budget}
+    return over_budget
+
+# Everything this process has sent to the hub, for /metrics
+process_command_stats = CommandStats()
+
+class InstrumentedRemoteConnection(RemoteConnection):
+    """🔢 RemoteConnection that counts and times every command, per process and per run"""
+
+    def execute(self, command, params):
+        started = time.perf_counter()
+        try:
+            return super().execute(command, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            process_command_stats.add(command, elapsed)
+            run_stats = current_command_stats.get()
+            if run_stats is not None:
+                run_stats.add(command, elapsed)
+
+class RecordingRemoteConnection(InstrumentedRemoteConnection):
+    """🎞️ RemoteConnection that appends each hub exchange to a JSONL file"""
+
+    _write_lock = threading.Lock()
+    _depth = threading.local()
+
+    def __init__(self, remote_server_addr, record_path, keep_alive=True, ignore_proxy=False, redact=True):
+        super().__init__(remote_server_addr, keep_alive=keep_alive, ignore_proxy=ignore_proxy)
+        self.record_path = record_path
+        self.redact = redact
+        self._base_path = urlparse(remote_server_addr).path.rstrip("/")
+
+    def _request(self, method, url, body=None):
+        # Redirects re-enter _request - only the outermost call is one command
+        depth = getattr(self._depth, "value", 0)
+        self._depth.value = depth + 1
+        started = time.perf_counter()
+        try:
+            response = super()._request(method, url, body)
+        finally:
+            self._depth.value = depth
+        if depth == 0:
+            self._record(method, url, body, response, time.perf_counter() - started)
+        return response
+
+    def _record(self, method, url, body, response, elapsed):
+        path = urlparse(url).path
+        if path.startswith(self._base_path):
+            path = path[len(self._base_path):] or "/"
+        try:
+            parsed_body = json.loads(body) if body else None
+        except (TypeError, ValueError):
+            parsed_body = body
+        # _request folds 4xx/5xx into {"status": code, "value": raw body}; success is the parsed JSON
+        status = response.get("status") if isinstance(response.get("status"), int) and response["status"] >= 400 else 200
+        if self.redact:
+            parsed_body, response = _redact(path, parsed_body, response)
+        entry = {
+            "method": method,
+            "path": path,
+            "body": parsed_body,
+            "status": status,
+            "response": response,
+            "elapsed": round(elapsed, 6),
+            "recorded_at": time.time()
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._write_lock:
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+def load_recording(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def summarize(entries):
+    """Round-trip counts and recorded hub time, overall and per command"""
+    per_command = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+    for entry in entries:
+        key = f"{entry['method']} {_command_pattern(entry['path'])}"
+        per_command[key]["count"] += 1
+        per_command[key]["seconds"] += entry.get("elapsed", 0.0)
+    return {
+        "round_trips": len(entries),
+        "hub_seconds": round(sum(entry.get("elapsed", 0.0) for entry in entries), 3),
+        "commands": {key: {"count": stats["count"], "seconds": round(stats["seconds"], 3)}
+                     for key, stats in sorted(per_command.items(), key=lambda item: -item[1]["seconds"])}
+    }
+
+def _command_pattern(path):
+    """/session/<id>/element/<id>/click -> /session/{id}/element/{id}/click"""
+    parts = path.strip("/").split("/")
+    for i in range(1, len(parts)):
+        if parts[i - 1] in ("session", "element", "shadow", "window", "frame") and parts[i] not in (
+                "element", "elements", "active", "rect", "handles"):
+            parts[i] = "{id}"
+    return "/" + "/".join(parts)
+
+class ReplayServer:
+    """🎞️ Serve a recording back: next unused response per method+path, in recorded order"""
+
+    def __init__(self, entries, latency="original", host="127.0.0.1", port=0):
+        if latency not in ("original", "zero"):
+            raise ValueError("latency must be 'original' or 'zero'")
+        self.latency = latency
+        self._queues = defaultdict(deque)
+        for entry in entries:
+            self._queues[(entry["method"], entry["path"])].append(entry)
+        self._lock = threading.Lock()
+        self.served = Counter()
+        self.unmatched = []
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _next(self, method, path):
+        with self._lock:
+            queue = self._queues.get((method, path))
+            if not queue:
+                self.unmatched.append(f"{method} {path}")
+                return None
+            # Keep the last response for commands polled more often than recorded
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+            self.served[f"{method} {_command_pattern(path)}"] += 1
+            return entry
+
+    def _handler_class(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes - Nagle would add ~40ms per command
+            disable_nagle_algorithm = True
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                path = urlparse(self.path).path
+                entry = replay._next(self.command, path)
+                if entry is None:
+                    status = 404
+                    payload = json.dumps({"value": {"error": "unknown command",
+                                                    "message": f"No recorded response for {self.command} {path}",
+                                                    "stacktrace": ""}})
+                else:
+                    if replay.latency == "original":
+                        time.sleep(entry.get("elapsed", 0.0))
+                    status = entry["status"]
+                    response = entry["response"]
+                    # Error responses were recorded as the raw body text
+                    payload = response["value"] if status >= 400 and isinstance(response.get("value"), str) \
+                        else json.dumps(response)
+                data = payload.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _serve
+
+            def log_message(self, format, *args):
+                logger.debug("replay: " + format, *args)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="webdriver-replay", daemon=True)
+        self._thread.start()
+        logger.info(f"🎞️ Replaying WebDriver traffic at {self.url} (latency={self.latency})")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {"served": sum(self.served.values()), "per_command": dict(self.served),
+                    "unmatched": list(self.unmatched)}
+
+def run_bench(recording, path="collection", game_id="7291257156", latency="zero", budgets=None):
+    """Drive main.py's code path against a replay server; report round-trips, wall time and budgets"""
+    # A bench must never write into the real history file - unless main.py is already loaded
+    os.environ.setdefault("ANALYTICS_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="webdriver-bench-"), "bench.db"))
+    # main.py logs to stdout - bind its handler to stderr so stdout carries only the report
+    with contextlib.redirect_stdout(sys.stderr):
+        import main as app_main
+
+    budgets = dict(app_main.COMMAND_BUDGETS, **(budgets or {}))
+    analytics = app_main.analytics
+    server = ReplayServer(load_recording(recording), latency).start()
+    # Point this process at the replay: fresh session each run, no re-recording, UI login as recorded
+    saved = (analytics.selenium_url, analytics.warm_driver.enabled, app_main.WEBDRIVER_RECORD_PATH,
+             analytics.stored_roblosecurity)
+    analytics.selenium_url = server.url
+    analytics.warm_driver.enabled = False
+    app_main.WEBDRIVER_RECORD_PATH = None
+    analytics.stored_roblosecurity = None
+    started = time.perf_counter()
+    try:
+        if path == "collection":
+            results = analytics.run_complete_analytics_collection(game_id)
+            commands = dict(results["webdriver_commands"])
+            outcome = {"overall_success": results.get("overall_success"), "aborted": results.get("aborted", False)}
+        else:
+            # Use main's view of this module: run as a script, this file is __main__, a separate copy
+            stats = app_main.CommandStats()
+            token = app_main.current_command_stats.set(stats)
+            try:
+                deadline = app_main.CollectionDeadline()
+                with analytics.get_remote_driver(deadline) as driver:
+                    with app_main.log_step("qptr_extraction", game_id=game_id):
+                        qptr_result = analytics.extract_qptr_data(driver, game_id, deadline)
+            finally:
+                app_main.current_command_stats.reset(token)
+            commands = stats.to_dict()
+            outcome = {"overall_success": qptr_result.get("success")}
+    finally:
+        wall_seconds = time.perf_counter() - started
+        server.stop()
+        (analytics.selenium_url, analytics.warm_driver.enabled, app_main.WEBDRIVER_RECORD_PATH,
+         analytics.stored_roblosecurity) = saved
+
+    over_budget = check_budgets(commands["total"], commands["per_step"], budgets)
+    commands.update(budgets=budgets, budget_exceeded=bool(over_budget), over_budget=over_budget)
+    return {
+        "path": path,
+        "latency": latency,
+        "wall_seconds": round(wall_seconds, 3),
+        **outcome,
+        "webdriver_commands": commands,
+        "replay": server.stats()
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record/replay W3C WebDriver traffic")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Serve a recording as a fake WebDriver hub")
+    serve.add_argument("recording")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=4444)
+    serve.add_argument("--latency", choices=("original", "zero"), default="original")
+
+    summary = commands.add_parser("summary", help="Round-trip counts and hub time of a recording")
+    summary.add_argument("recording")
+
+    bench = commands.add_parser("bench", help="Replay through main.py and check WebDriver command budgets")
+    bench.add_argument("recording")
+    bench.add_argument("--path", choices=("collection", "qptr"), default="collection",
+                       help="collection = run_complete_analytics_collection, qptr = extract_qptr_data only")
+    bench.add_argument("--game-id", default="7291257156")
+    bench.add_argument("--latency", choices=("original", "zero"), default="zero")
+    bench.add_argument("--budgets", type=json.loads, default={},
+                       help='JSON overrides for main.COMMAND_BUDGETS, e.g. \'{"total": 80}\'')
+
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        print(json.dumps(summarize(load_recording(args.recording)), indent=2))
+        return 0
+
+    if args.command == "bench":
+        report = run_bench(args.recording, args.path, args.game_id, args.latency, args.budgets)
+        print(json.dumps(report, indent=2))
+        return 1 if report["webdriver_commands"]["budget_exceeded"] else 0
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    server = ReplayServer(load_recording(args.recording), args.latency, args.host, args.port).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.stats(), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())